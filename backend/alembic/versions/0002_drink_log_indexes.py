@@ -0,0 +1,24 @@
+"""drink log indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_drink_logs_created_at_id", "drink_logs", ["created_at", "id"])
+    op.create_index("ix_drink_logs_bean_id_created_at_id", "drink_logs", ["bean_id", "created_at", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_drink_logs_bean_id_created_at_id", table_name="drink_logs")
+    op.drop_index("ix_drink_logs_created_at_id", table_name="drink_logs")
@@ -0,0 +1,97 @@
+"""bean stats rollups
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+TASTING_FIELDS = ("sweetness", "bitterness", "acidity", "body_mouthfeel", "balance")
+SETTINGS_FIELDS = (
+    "temperature_level",
+    "body_level",
+    '"order"',
+    "coffee_volume_ml",
+    "milk_volume_ml",
+    "strength_level",
+    "grind_setting",
+)
+
+
+def upgrade() -> None:
+    totals = [sa.Column(f"{field}_sum", sa.Integer(), nullable=False) for field in TASTING_FIELDS]
+    top_totals = [sa.Column(f"top_{field}_sum", sa.Integer(), nullable=False) for field in TASTING_FIELDS]
+    op.create_table(
+        "bean_stats",
+        sa.Column("bean_id", sa.String(), sa.ForeignKey("beans.id"), primary_key=True),
+        sa.Column("drink_count", sa.Integer(), nullable=False),
+        sa.Column("rating_sum", sa.Integer(), nullable=False),
+        *totals,
+        sa.Column("top_rated_count", sa.Integer(), nullable=False),
+        *top_totals,
+    )
+    op.create_table(
+        "bean_daily_stats",
+        sa.Column("bean_id", sa.String(), sa.ForeignKey("beans.id"), nullable=False),
+        sa.Column("day", sa.String(), nullable=False),
+        sa.Column("drink_count", sa.Integer(), nullable=False),
+        sa.Column("rating_sum", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("bean_id", "day"),
+    )
+    op.create_table(
+        "bean_settings_stats",
+        sa.Column("bean_id", sa.String(), sa.ForeignKey("beans.id"), nullable=False),
+        sa.Column("temperature_level", sa.String(), nullable=False),
+        sa.Column("body_level", sa.String(), nullable=False),
+        sa.Column("order", sa.String(), nullable=False),
+        sa.Column("coffee_volume_ml", sa.Float(), nullable=False),
+        sa.Column("milk_volume_ml", sa.Float(), nullable=False),
+        sa.Column("strength_level", sa.String(), nullable=False),
+        sa.Column("grind_setting", sa.Integer(), nullable=False),
+        sa.Column("overall_rating", sa.Integer(), nullable=False),
+        sa.Column("drink_count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint(
+            "bean_id",
+            "temperature_level",
+            "body_level",
+            "order",
+            "coffee_volume_ml",
+            "milk_volume_ml",
+            "strength_level",
+            "grind_setting",
+            "overall_rating",
+        ),
+    )
+
+    sums = ", ".join(f"SUM({field})" for field in TASTING_FIELDS)
+    top_sums = ", ".join(
+        f"SUM(CASE WHEN overall_rating >= 4 THEN {field} ELSE 0 END)" for field in TASTING_FIELDS
+    )
+    op.execute(
+        "INSERT INTO bean_stats SELECT bean_id, COUNT(*), SUM(overall_rating), "
+        f"{sums}, SUM(CASE WHEN overall_rating >= 4 THEN 1 ELSE 0 END), {top_sums} "
+        "FROM drink_logs GROUP BY bean_id"
+    )
+    op.execute(
+        "INSERT INTO bean_daily_stats SELECT bean_id, date(created_at), COUNT(*), SUM(overall_rating) "
+        "FROM drink_logs GROUP BY bean_id, date(created_at)"
+    )
+    settings_columns = ", ".join(SETTINGS_FIELDS)
+    op.execute(
+        f"INSERT INTO bean_settings_stats SELECT bean_id, {settings_columns}, overall_rating, COUNT(*) "
+        f"FROM drink_logs GROUP BY bean_id, {settings_columns}, overall_rating"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("bean_settings_stats")
+    op.drop_table("bean_daily_stats")
+    op.drop_table("bean_stats")
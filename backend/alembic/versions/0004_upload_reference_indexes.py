@@ -0,0 +1,24 @@
+"""upload reference indexes
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_beans_image_path", "beans", ["image_path"])
+    op.create_index("ix_drink_logs_photo_path", "drink_logs", ["photo_path"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_drink_logs_photo_path", table_name="drink_logs")
+    op.drop_index("ix_beans_image_path", table_name="beans")
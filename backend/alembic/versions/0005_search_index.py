@@ -0,0 +1,53 @@
+"""full-text search index
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+# (content table, fts table, indexed columns, bm25 column weights)
+INDEXES = (
+    ("beans", "beans_fts", ("name", "roaster", "origin", "tasting_notes", "notes"), (10.0, 4.0, 4.0, 3.0, 1.0)),
+    ("drink_logs", "drink_logs_fts", ("custom_label", "notes"), (2.0, 1.0)),
+)
+
+
+def upgrade() -> None:
+    for table, fts, columns, weights in INDEXES:
+        column_list = ", ".join(columns)
+        new_values = ", ".join(f"new.{column}" for column in columns)
+        old_values = ", ".join(f"old.{column}" for column in columns)
+        op.execute(
+            f"CREATE VIRTUAL TABLE {fts} USING fts5({column_list}, content='{table}', content_rowid='rowid', "
+            "tokenize='unicode61 remove_diacritics 2')"
+        )
+        op.execute(
+            f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {fts}(rowid, {column_list}) VALUES (new.rowid, {new_values}); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {column_list}) VALUES ('delete', old.rowid, {old_values}); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {column_list} ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {column_list}) VALUES ('delete', old.rowid, {old_values}); "
+            f"INSERT INTO {fts}(rowid, {column_list}) VALUES (new.rowid, {new_values}); END"
+        )
+        op.execute(f"INSERT INTO {fts}({fts}, rank) VALUES ('rank', 'bm25({', '.join(map(str, weights))})')")
+        op.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    for _, fts, _, _ in reversed(INDEXES):
+        for suffix in ("au", "ad", "ai"):
+            op.execute(f"DROP TRIGGER {fts}_{suffix}")
+        op.execute(f"DROP TABLE {fts}")
@@ -0,0 +1,110 @@
+from collections.abc import Iterable
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from .models import BeanDailyStats, BeanSettingsStats, BeanStats, DrinkLog
+from .schemas import BeanAnalytics, GlobalAnalyticsSeries
+from .stats import TASTING_FIELDS
+
+SettingsRow = tuple[str, int, float, int, int]
+
+TIMELINE_BUCKETS = {
+    "day": lambda column: func.date(column),
+    # SQLite's "weekday 0" moves forward to Sunday; stepping back six days gives the Monday.
+    "week": lambda column: func.date(column, "weekday 0", "-6 days"),
+    "month": lambda column: func.strftime("%Y-%m-01", column),
+}
+
+
+def compute_bean_analytics(db: Session, bean_id: str) -> BeanAnalytics:
+    keys = (
+        BeanSettingsStats.temperature_level,
+        BeanSettingsStats.grind_setting,
+        BeanSettingsStats.coffee_volume_ml,
+        BeanSettingsStats.overall_rating,
+    )
+    settings_rows = db.execute(
+        select(*keys, func.sum(BeanSettingsStats.drink_count))
+        .where(BeanSettingsStats.bean_id == bean_id)
+        .group_by(*keys)
+    ).all()
+    daily_rows = db.execute(
+        select(BeanDailyStats.day, BeanDailyStats.drink_count, BeanDailyStats.rating_sum)
+        .where(BeanDailyStats.bean_id == bean_id)
+        .order_by(BeanDailyStats.day)
+    ).all()
+    return BeanAnalytics(
+        **summarize_settings(settings_rows),
+        rating_timeline=[
+            {"date": day, "average_rating": rating_sum / count} for day, count, rating_sum in daily_rows
+        ],
+        radar=radar_series(db.get(BeanStats, bean_id)),
+    )
+
+
+def summarize_settings(rows: Iterable[SettingsRow]) -> dict:
+    # One pass over (temperature, grind, coffee volume, rating, count) tuples builds
+    # both scatter series and the per-temperature averages.
+    grind_points: dict[tuple[int, int], None] = {}
+    coffee_points: dict[tuple[float, int], None] = {}
+    temperatures: dict[str, list[int]] = {}
+    for temperature, grind, coffee_volume, rating, count in rows:
+        grind_points[(grind, rating)] = None
+        coffee_points[(coffee_volume, rating)] = None
+        totals = temperatures.setdefault(temperature, [0, 0])
+        totals[0] += count
+        totals[1] += count * rating
+    return {
+        "rating_vs_grind": [{"x": x, "y": y} for x, y in grind_points],
+        "rating_vs_coffee_volume": [{"x": x, "y": y} for x, y in coffee_points],
+        "rating_by_temperature": [
+            {"temperature_level": temperature, "average_rating": rating_sum / count}
+            for temperature, (count, rating_sum) in temperatures.items()
+        ],
+    }
+
+
+def radar_series(stats: BeanStats | None) -> list[dict]:
+    if stats is None or stats.drink_count <= 0:
+        return []
+    radar = []
+    for category in TASTING_FIELDS:
+        top_avg = (
+            getattr(stats, f"top_{category}_sum") / stats.top_rated_count if stats.top_rated_count else None
+        )
+        radar.append(
+            {
+                "category": category.replace("_", " ").title(),
+                "average": getattr(stats, f"{category}_sum") / stats.drink_count,
+                "top_rated_average": top_avg,
+            }
+        )
+    return radar
+
+
+def compute_global_series(db: Session, bucket: str = "day") -> GlobalAnalyticsSeries:
+    bucket_expr = TIMELINE_BUCKETS[bucket](DrinkLog.created_at)
+    count = func.count()
+    average = func.avg(DrinkLog.overall_rating)
+    timeline = db.execute(
+        select(bucket_expr, count, average).group_by(bucket_expr).order_by(bucket_expr)
+    ).all()
+
+    def distribution(column) -> list[dict]:
+        rows = db.execute(select(column, count, average).group_by(column).order_by(count.desc())).all()
+        return [{"key": key, "drink_count": total, "average_rating": float(avg)} for key, total, avg in rows]
+
+    histogram = db.execute(
+        select(DrinkLog.overall_rating, count).group_by(DrinkLog.overall_rating).order_by(DrinkLog.overall_rating)
+    ).all()
+    return GlobalAnalyticsSeries(
+        bucket=bucket,
+        rating_timeline=[
+            {"bucket": key, "drink_count": total, "average_rating": float(avg)} for key, total, avg in timeline
+        ],
+        by_drink_type=distribution(DrinkLog.drink_type),
+        by_made_by=distribution(DrinkLog.made_by),
+        by_strength=distribution(DrinkLog.strength_level),
+        rating_histogram=[{"rating": rating, "drink_count": total} for rating, total in histogram],
+    )
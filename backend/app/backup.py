@@ -0,0 +1,130 @@
+import contextvars
+import hashlib
+import os
+import threading
+import uuid
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+from .config import settings
+from .database import SessionLocal
+from .models import Bean, DrinkLog
+
+ARCHIVE_FORMAT_VERSION = "1"
+
+# Media that is already compressed gains nothing from deflate, so it is stored as-is.
+STORED_SUFFIXES = {
+    ".avif",
+    ".gif",
+    ".gz",
+    ".heic",
+    ".heif",
+    ".jpeg",
+    ".jpg",
+    ".mov",
+    ".mp4",
+    ".png",
+    ".webp",
+    ".zip",
+}
+
+
+class ExportArchiver:
+    def __init__(self, export_dir: Path, db_path: Path, upload_dir: Path) -> None:
+        self.export_dir = export_dir
+        self.db_path = db_path
+        self.upload_dir = upload_dir
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="export-zip")
+        self._pending: Future | None = None
+        self._pending_key: str | None = None
+
+    def request(self) -> Future:
+        key = self.fingerprint()
+        path = self._artifact_path(key)
+        with self._lock:
+            if self._pending is not None and self._pending_key == key:
+                return self._pending
+            if path.exists():
+                future: Future = Future()
+                future.set_result(path)
+                return future
+            # The build runs in the context of the request that started it, so its
+            # SQL is accounted to that request.
+            future = self._executor.submit(contextvars.copy_context().run, self._build, key)
+            self._pending = future
+            self._pending_key = key
+        # Cleared once the future settles, even if it was cancelled before the build ran.
+        future.add_done_callback(self._clear_pending)
+        return future
+
+    def _clear_pending(self, future: Future) -> None:
+        with self._lock:
+            if self._pending is future:
+                self._pending = None
+                self._pending_key = None
+
+    def fingerprint(self) -> str:
+        digest = hashlib.blake2b(ARCHIVE_FORMAT_VERSION.encode(), digest_size=16)
+        for db_file in (self.db_path, self.db_path.with_name(f"{self.db_path.name}-wal")):
+            if db_file.exists():
+                stat = db_file.stat()
+                digest.update(f"{db_file.name}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+        for path, arcname in self._upload_files():
+            stat = path.stat()
+            digest.update(f"{arcname}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+        return digest.hexdigest()
+
+    def _artifact_path(self, key: str) -> Path:
+        return self.export_dir / f"export-{key}.zip"
+
+    def _upload_files(self) -> list[tuple[Path, str]]:
+        if not self.upload_dir.exists():
+            return []
+        files = [
+            path
+            for path in self.upload_dir.rglob("*")
+            if path.is_file() and not any(part.startswith(".") for part in path.relative_to(self.upload_dir).parts)
+        ]
+        return sorted(
+            (path, str(Path("uploads") / path.relative_to(self.upload_dir))) for path in files
+        )
+
+    def _build(self, key: str) -> Path:
+        from .routers.export import iter_csv, iter_table_dicts, stream_json
+
+        self.export_dir.mkdir(parents=True, exist_ok=True)
+        target = self._artifact_path(key)
+        tmp_path = self.export_dir / f".export-{uuid.uuid4().hex}.tmp"
+        try:
+            with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED) as zip_file:
+                with zip_file.open("export.json", "w") as entry:
+                    for chunk in stream_json():
+                        entry.write(chunk.encode())
+                with SessionLocal() as db:
+                    for name, table in (("beans.csv", Bean.__table__), ("drinks.csv", DrinkLog.__table__)):
+                        with zip_file.open(name, "w") as entry:
+                            for chunk in iter_csv(iter_table_dicts(db, table)):
+                                entry.write(chunk.encode())
+                for path, arcname in self._upload_files():
+                    compress_type = (
+                        zipfile.ZIP_STORED if path.suffix.lower() in STORED_SUFFIXES else zipfile.ZIP_DEFLATED
+                    )
+                    zip_file.write(path, arcname, compress_type=compress_type)
+            os.replace(tmp_path, target)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        self._prune(keep=target)
+        return target
+
+    def _prune(self, keep: Path) -> None:
+        # Keep the previous artifact too, in case a response is still streaming it.
+        artifacts = sorted(
+            self.export_dir.glob("export-*.zip"), key=lambda path: path.stat().st_mtime_ns, reverse=True
+        )
+        for path in [path for path in artifacts if path != keep][1:]:
+            path.unlink(missing_ok=True)
+
+
+archiver = ExportArchiver(settings.data_dir / "exports", settings.db_path, settings.upload_dir)
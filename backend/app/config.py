@@ -9,6 +9,35 @@ class Settings(BaseSettings):
     db_path: Path = Path("/data/app.db")
     upload_dir: Path = Path("/data/uploads")
 
+    thumbnail_workers: int = 2
+    rendition_cache_bytes: int = 256 * 1024 * 1024
+
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_cache_size_kib: int = 20000
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_temp_store: str = "MEMORY"
+    sqlite_maintenance_interval_s: int = 3600
+
+    async_db: bool = False
+    write_linger_ms: float = 2.0
+    write_batch_max: int = 256
+
+    response_cache_entries: int = 256
+    bean_memo_entries: int = 1024
+
+    metrics_enabled: bool = True
+    slow_query_ms: float = 250.0
+
+    profiling_enabled: bool = False
+    profiling_interval_ms: float = 1.0
+
+    compression_enabled: bool = True
+    compression_min_bytes: int = 1024
+    compression_level: int = 6
+    precompress_frontend: bool = True
+
     class Config:
         env_prefix = ""
         case_sensitive = False
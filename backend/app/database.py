@@ -1,7 +1,15 @@
-from sqlalchemy import create_engine
+import logging
+import threading
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 
 from .config import settings
+from .metrics import instrument_engine
+from .profiling import instrument_engine as instrument_engine_for_profiling
+
+logger = logging.getLogger(__name__)
 
 
 class Base(DeclarativeBase):
@@ -10,3 +18,78 @@ class Base(DeclarativeBase):
 
 engine = create_engine(f"sqlite:///{settings.db_path}", connect_args={"check_same_thread": False})
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+if settings.metrics_enabled:
+    instrument_engine(engine)
+if settings.profiling_enabled:
+    instrument_engine_for_profiling(engine)
+
+
+def sqlite_pragmas() -> list[str]:
+    return [
+        f"PRAGMA journal_mode={settings.sqlite_journal_mode}",
+        f"PRAGMA synchronous={settings.sqlite_synchronous}",
+        f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}",
+        # A negative cache_size is measured in KiB rather than pages.
+        f"PRAGMA cache_size=-{int(settings.sqlite_cache_size_kib)}",
+        f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}",
+        f"PRAGMA temp_store={settings.sqlite_temp_store}",
+    ]
+
+
+@event.listens_for(engine, "connect")
+def _configure_sqlite_connection(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in sqlite_pragmas():
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+def create_async_session_factory() -> async_sessionmaker[AsyncSession] | None:
+    if not settings.async_db:
+        return None
+    try:
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{settings.db_path}")
+    except ModuleNotFoundError as exc:
+        raise RuntimeError("ASYNC_DB requires the aiosqlite package") from exc
+    event.listen(async_engine.sync_engine, "connect", _configure_sqlite_connection)
+    if settings.metrics_enabled:
+        instrument_engine(async_engine.sync_engine)
+    if settings.profiling_enabled:
+        instrument_engine_for_profiling(async_engine.sync_engine)
+    return async_sessionmaker(async_engine, expire_on_commit=False)
+
+
+AsyncSessionLocal = create_async_session_factory()
+
+
+def run_maintenance() -> None:
+    with engine.connect() as connection:
+        connection.execute(text("PRAGMA optimize"))
+        if settings.sqlite_journal_mode.upper() == "WAL":
+            connection.execute(text("PRAGMA wal_checkpoint(PASSIVE)"))
+    # Imported here because utils depends on the models built on this module.
+    from .utils import sweep_unreferenced_uploads
+
+    with SessionLocal() as db:
+        removed = sweep_unreferenced_uploads(db)
+    if removed:
+        logger.info("Removed %d unreferenced uploads", removed)
+
+
+class MaintenanceThread(threading.Thread):
+    def __init__(self, interval_s: float) -> None:
+        super().__init__(name="sqlite-maintenance", daemon=True)
+        self.interval_s = interval_s
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval_s):
+            try:
+                run_maintenance()
+            except Exception:
+                logger.exception("SQLite maintenance failed")
+
+    def stop(self) -> None:
+        self._stopped.set()
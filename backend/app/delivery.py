@@ -0,0 +1,191 @@
+import gzip
+import logging
+import os
+import re
+import sys
+import zlib
+from mimetypes import guess_type
+from pathlib import Path
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+# Vite emits bundle files as assets/<name>-<8 character hash>.<ext>.
+HASHED_ASSET = re.compile(r"assets/.+-[A-Za-z0-9_-]{8}\.\w+")
+CONTENT_ADDRESSED = re.compile(r"objects/.+")
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+PRECOMPRESS_SUFFIXES = {".html", ".js", ".mjs", ".css", ".json", ".map", ".svg", ".txt", ".xml", ".webmanifest"}
+PRECOMPRESS_MIN_BYTES = 1024
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "application/javascript", "image/svg+xml", "text/")
+
+
+def accepted_encodings(header: str) -> set[str]:
+    accepted = set()
+    for item in header.split(","):
+        coding, _, params = item.partition(";")
+        quality = params.strip().removeprefix("q=")
+        try:
+            if params and float(quality) <= 0:
+                continue
+        except ValueError:
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+class CachedStaticFiles(StaticFiles):
+    # Serves a precompressed .br or .gz sibling when the client accepts it, and
+    # lets browsers keep files whose names are content hashes forever. Other
+    # files are revalidated against their ETag on every use.
+    def __init__(self, *, immutable: re.Pattern[str], **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.immutable = immutable
+
+    def file_response(
+        self, full_path: str, stat_result: os.stat_result, scope: Scope, status_code: int = 200
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        relative = Path(os.path.relpath(full_path, self.directory)).as_posix()
+        headers = {"Cache-Control": IMMUTABLE if self.immutable.fullmatch(relative) else REVALIDATE}
+        media_type = guess_type(full_path)[0] or "text/plain"
+        path = full_path
+        if status_code == 200 and Path(full_path).suffix in PRECOMPRESS_SUFFIXES:
+            accepted = accepted_encodings(request_headers.get("accept-encoding", ""))
+            for encoding, suffix in PRECOMPRESSED:
+                try:
+                    variant = os.stat(full_path + suffix)
+                except OSError:
+                    continue
+                headers["Vary"] = "Accept-Encoding"
+                # A sibling older than the file it was made from is stale.
+                if encoding in accepted and variant.st_mtime >= stat_result.st_mtime:
+                    path, stat_result = full_path + suffix, variant
+                    headers["Content-Encoding"] = encoding
+                    break
+        response = FileResponse(
+            path, status_code=status_code, headers=headers, media_type=media_type, stat_result=stat_result
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+def precompress(directory: Path) -> int:
+    # Writes .br and .gz siblings next to text assets, skipping those that are
+    # already up to date, so it is cheap to run on every start.
+    import brotli
+
+    encoders = (
+        (".br", lambda data: brotli.compress(data, quality=11)),
+        (".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0)),
+    )
+    written = 0
+    for source in directory.rglob("*"):
+        if source.suffix not in PRECOMPRESS_SUFFIXES or not source.is_file():
+            continue
+        source_stat = source.stat()
+        if source_stat.st_size < PRECOMPRESS_MIN_BYTES:
+            continue
+        data = None
+        for suffix, compress in encoders:
+            target = source.with_name(source.name + suffix)
+            if target.exists() and target.stat().st_mtime >= source_stat.st_mtime:
+                continue
+            data = data if data is not None else source.read_bytes()
+            compressed = compress(data)
+            if len(compressed) >= len(data):
+                continue
+            partial = target.with_name(target.name + ".tmp")
+            partial.write_bytes(compressed)
+            os.utime(partial, ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns))
+            os.replace(partial, target)
+            written += 1
+    return written
+
+
+def precompress_frontend(directory: Path) -> None:
+    try:
+        written = precompress(directory)
+    except OSError:
+        # The bundle may be read-only for the app user; it is then served uncompressed
+        # or compressed on the fly.
+        logger.warning("Could not precompress %s", directory, exc_info=True)
+        return
+    if written:
+        logger.info("Precompressed %d frontend files", written)
+
+
+class CompressionMiddleware:
+    # Gzips JSON, text and CSV responses on the fly when they are at least
+    # COMPRESSION_MIN_BYTES or streamed without a length. Bodies that already
+    # have an encoding (such as precompressed assets) pass through untouched.
+    def __init__(self, app: ASGIApp, minimum_size: int, level: int) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.level = level
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_headers = Headers(scope=scope)
+        accepts_gzip = "gzip" in accepted_encodings(request_headers.get("accept-encoding", ""))
+        compressor = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal compressor
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                if self._compressible(scope, message["status"], headers):
+                    if "accept-encoding" not in headers.get("vary", "").lower():
+                        headers.add_vary_header("Accept-Encoding")
+                    if accepts_gzip:
+                        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+                        headers["Content-Encoding"] = "gzip"
+                        del headers["Content-Length"]
+                        # The bytes differ from the identity body, so a strong tag no longer applies.
+                        etag = headers.get("etag")
+                        if etag and not etag.startswith("W/"):
+                            headers["ETag"] = "W/" + etag
+                await send(message)
+            elif message["type"] == "http.response.body" and compressor is not None:
+                more_body = message.get("more_body", False)
+                body = compressor.compress(message.get("body", b""))
+                if not more_body:
+                    body += compressor.flush()
+                elif not body:
+                    return
+                await send({"type": "http.response.body", "body": body, "more_body": more_body})
+            else:
+                await send(message)
+
+        await self.app(scope, receive, send_compressed)
+
+    def _compressible(self, scope: Scope, status: int, headers: MutableHeaders) -> bool:
+        if scope["method"] == "HEAD" or status < 200 or status in (204, 206, 304):
+            return False
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "")
+        if not content_type.startswith(COMPRESSIBLE_TYPES) or content_type.startswith("text/event-stream"):
+            return False
+        length = headers.get("content-length")
+        return length is None or int(length) >= self.minimum_size
+
+
+def main(argv: list[str]) -> int:
+    if len(argv) != 2 or argv[0] != "precompress":
+        print("usage: python -m app.delivery precompress <directory>", file=sys.stderr)
+        return 2
+    print(f"Precompressed {precompress(Path(argv[1]))} files")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
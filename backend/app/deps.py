@@ -1,6 +1,13 @@
-from collections.abc import Generator
+from collections.abc import AsyncIterator, Callable, Generator
+from typing import Any, TypeVar
 
-from .database import SessionLocal
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .database import AsyncSessionLocal, SessionLocal
+
+T = TypeVar("T")
 
 
 def get_db() -> Generator:
@@ -9,3 +16,28 @@ def get_db() -> Generator:
         yield db
     finally:
         db.close()
+
+
+class ThreadpoolSession:
+    # Exposes the one AsyncSession method the async routes use, backed by a
+    # blocking Session on the threadpool, for when ASYNC_DB is off.
+    def __init__(self, session: Session) -> None:
+        self.session = session
+
+    async def run_sync(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        return await run_in_threadpool(fn, self.session, *args, **kwargs)
+
+
+AsyncDb = AsyncSession | ThreadpoolSession
+
+
+async def get_async_db() -> AsyncIterator[AsyncDb]:
+    if AsyncSessionLocal is None:
+        db = SessionLocal()
+        try:
+            yield ThreadpoolSession(db)
+        finally:
+            db.close()
+    else:
+        async with AsyncSessionLocal() as db:
+            yield db
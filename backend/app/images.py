@@ -0,0 +1,42 @@
+import os
+import uuid
+from pathlib import Path
+
+
+def create_thumbnail(source: Path, destination: Path, size: int = 400) -> None:
+    # Pillow is imported on first use so that it stays off the startup path.
+    from PIL import Image
+
+    tmp_path = destination.with_name(f".{destination.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        with Image.open(source) as img:
+            image_format = img.format or "JPEG"
+            # For JPEG, draft() lets the decoder downscale while decoding.
+            img.draft(img.mode, (size, size))
+            img.thumbnail((size, size))
+            img.save(tmp_path, format=image_format)
+        os.replace(tmp_path, destination)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+RENDITION_FORMATS = {"webp": "WEBP", "jpeg": "JPEG", "png": "PNG"}
+RENDITION_MODES = {"webp": ("RGB", "RGBA"), "jpeg": ("RGB", "L"), "png": ("1", "L", "LA", "P", "RGB", "RGBA")}
+
+
+def render_image(source: Path, destination: Path, width: int, fmt: str) -> None:
+    from PIL import Image
+
+    tmp_path = destination.with_name(f".{destination.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        with Image.open(source) as img:
+            img.draft(img.mode, (width, width * img.height // max(img.width, 1)))
+            # Sources such as CMYK JPEGs or 16-bit PNGs have modes the target format cannot store.
+            if img.mode not in RENDITION_MODES[fmt]:
+                img = img.convert("RGBA" if fmt != "jpeg" and img.has_transparency_data else "RGB")
+            if img.width > width:
+                img = img.resize((width, max(1, round(img.height * width / img.width))), Image.LANCZOS)
+            img.save(tmp_path, format=RENDITION_FORMATS[fmt])
+        os.replace(tmp_path, destination)
+    finally:
+        tmp_path.unlink(missing_ok=True)
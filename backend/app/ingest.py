@@ -0,0 +1,186 @@
+import codecs
+import json
+import uuid
+from collections.abc import AsyncIterator
+from datetime import datetime
+from typing import Any
+
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from .models import Bean, DrinkLog
+from .schemas import DrinkLogBulkItem
+from .stats import apply_drinks
+
+BULK_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+# Far above any real drink; a pending element or line past this is treated as malformed.
+MAX_RECORD_BYTES = 1024 * 1024
+
+Record = tuple[int, Any]
+
+
+class RecordError(Exception):
+    pass
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[Record]:
+    buffer = b""
+    index = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield index, _loads(line)
+                index += 1
+        if len(buffer) > MAX_RECORD_BYTES:
+            raise RecordError(f"Line {index} exceeds {MAX_RECORD_BYTES} bytes")
+    if buffer.strip():
+        yield index, _loads(buffer)
+
+
+async def iter_json_array(chunks: AsyncIterator[bytes]) -> AsyncIterator[Record]:
+    # Decodes one element at a time with raw_decode so the array is never held whole.
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    text = ""
+    position = 0
+    index = 0
+    started = False
+    async for chunk in chunks:
+        text = text[position:] + utf8.decode(chunk)
+        position = 0
+        while True:
+            position = _skip_separators(text, position)
+            if position >= len(text):
+                break
+            if not started:
+                if text[position] != "[":
+                    raise RecordError("Expected a JSON array or NDJSON body")
+                started = True
+                position += 1
+                continue
+            if text[position] == "]":
+                return
+            try:
+                value, end = decoder.raw_decode(text, position)
+            except json.JSONDecodeError:
+                break
+            if end == len(text):
+                # A trailing scalar may continue in the next chunk.
+                break
+            yield index, value
+            index += 1
+            position = end
+        if len(text) - position > MAX_RECORD_BYTES:
+            raise RecordError(f"Element {index} exceeds {MAX_RECORD_BYTES} bytes")
+    raise RecordError(f"Malformed JSON array at element {index}")
+
+
+def _skip_separators(text: str, position: int) -> int:
+    while position < len(text) and text[position] in " \t\r\n,":
+        position += 1
+    return position
+
+
+def _loads(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError as exc:
+        return RecordError(f"Invalid JSON: {exc.msg}")
+
+
+def insert_drink_batch(db: Session, batch: list[Record]) -> tuple[int, list[dict]]:
+    errors: list[dict] = []
+    rows: list[tuple[int, dict]] = []
+    for index, raw in batch:
+        if isinstance(raw, RecordError):
+            errors.append({"index": index, "detail": str(raw)})
+            continue
+        try:
+            item = DrinkLogBulkItem.model_validate(raw)
+        except ValidationError as exc:
+            errors.append({"index": index, "detail": _validation_detail(exc)})
+            continue
+        row = item.model_dump()
+        row["id"] = row["id"] or str(uuid.uuid4())
+        row["created_at"] = row["created_at"] or datetime.utcnow()
+        rows.append((index, row))
+
+    bean_ids = {row["bean_id"] for _, row in rows}
+    known_beans = set(db.scalars(select(Bean.id).where(Bean.id.in_(bean_ids)))) if bean_ids else set()
+    drink_ids = [row["id"] for _, row in rows]
+    taken_ids = set(db.scalars(select(DrinkLog.id).where(DrinkLog.id.in_(drink_ids)))) if drink_ids else set()
+
+    accepted = []
+    for index, row in rows:
+        if row["bean_id"] not in known_beans:
+            errors.append({"index": index, "detail": "Bean not found"})
+        elif row["id"] in taken_ids:
+            errors.append({"index": index, "detail": "Duplicate drink id"})
+        else:
+            taken_ids.add(row["id"])
+            accepted.append(row)
+
+    if accepted:
+        db.execute(insert(DrinkLog.__table__), accepted)
+        apply_drinks(db, accepted, 1)
+    db.commit()
+    return len(accepted), sorted(errors, key=lambda error: error["index"])
+
+
+def _validation_detail(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in exc.errors())
+
+
+async def ingest_drinks(db: Session, chunks: AsyncIterator[bytes], content_type: str) -> dict:
+    chunks = aiter(chunks)
+    first = b""
+    async for first in chunks:
+        if first.strip():
+            break
+    if "ndjson" in content_type or "jsonl" in content_type:
+        is_array = False
+    elif "json" in content_type:
+        is_array = True
+    else:
+        is_array = first.lstrip().startswith(b"[")
+    records = (iter_json_array if is_array else iter_ndjson)(_prepend(first, chunks))
+
+    result = {"inserted": 0, "error_count": 0, "errors": []}
+    batch: list[Record] = []
+    seen = 0
+
+    def report(batch_errors: list[dict]) -> None:
+        result["error_count"] += len(batch_errors)
+        result["errors"].extend(batch_errors[: MAX_REPORTED_ERRORS - len(result["errors"])])
+
+    async def flush() -> None:
+        inserted, batch_errors = await run_in_threadpool(insert_drink_batch, db, list(batch))
+        result["inserted"] += inserted
+        report(batch_errors)
+        batch.clear()
+
+    malformed: RecordError | None = None
+    try:
+        async for record in records:
+            batch.append(record)
+            seen += 1
+            if len(batch) >= BULK_BATCH_SIZE:
+                await flush()
+    except RecordError as exc:
+        malformed = exc
+    if batch:
+        await flush()
+    if malformed is not None:
+        report([{"index": seen, "detail": str(malformed)}])
+    return result
+
+
+async def _prepend(first: bytes, rest: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    yield first
+    async for chunk in rest:
+        yield chunk
@@ -1,36 +1,69 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI
-from fastapi.responses import FileResponse
-from fastapi.staticfiles import StaticFiles
 
+from . import startup
 from .config import settings
-from .routers import analytics, beans, drinks, export
+from .database import MaintenanceThread
+from .delivery import CONTENT_ADDRESSED, HASHED_ASSET, CachedStaticFiles, CompressionMiddleware, precompress_frontend
+from .metrics import MetricsMiddleware
+from .profiling import ProfilingMiddleware
+from .routers import analytics, beans, drinks, export, metrics, renditions, search
+from .utils import shutdown_thumbnail_pool
+from .writer import write_queue
 
 
-app = FastAPI(title="BrewNotes")
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    with startup.phase("lifespan"):
+        if settings.precompress_frontend and frontend_path.exists():
+            precompress_frontend(frontend_path)
+        maintenance = None
+        if settings.sqlite_maintenance_interval_s > 0:
+            maintenance = MaintenanceThread(settings.sqlite_maintenance_interval_s)
+            maintenance.start()
+    startup.report()
+    yield
+    if maintenance is not None:
+        maintenance.stop()
+    write_queue.stop()
+    shutdown_thumbnail_pool()
+
+
+frontend_path = Path(__file__).resolve().parents[2] / "frontend" / "dist"
+
+app = FastAPI(title="BrewNotes", lifespan=lifespan)
 
 app.include_router(beans.router)
 app.include_router(drinks.router)
 app.include_router(analytics.router)
 app.include_router(export.router)
-
-frontend_path = Path(__file__).resolve().parents[2] / "frontend" / "dist"
-
-if frontend_path.exists():
-    app.mount("/", StaticFiles(directory=frontend_path, html=True), name="frontend")
+app.include_router(renditions.router)
+app.include_router(search.router)
+if settings.compression_enabled:
+    app.add_middleware(
+        CompressionMiddleware, minimum_size=settings.compression_min_bytes, level=settings.compression_level
+    )
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(metrics.router)
+if settings.profiling_enabled:
+    app.add_middleware(ProfilingMiddleware)
 
 uploads_path = settings.upload_dir
 uploads_path.mkdir(parents=True, exist_ok=True)
-app.mount("/uploads", StaticFiles(directory=uploads_path), name="uploads")
+app.mount("/uploads", CachedStaticFiles(directory=uploads_path, immutable=CONTENT_ADDRESSED), name="uploads")
 
 
 @app.get("/health")
-def health_check() -> dict:
+async def health_check() -> dict:
     return {"status": "ok"}
 
 
-@app.get("/")
-def spa_index() -> FileResponse:
-    index_file = frontend_path / "index.html"
-    return FileResponse(index_file)
+# Mounted last, since a mount at "/" matches every path left unrouted.
+if frontend_path.exists():
+    app.mount(
+        "/", CachedStaticFiles(directory=frontend_path, html=True, immutable=HASHED_ASSET), name="frontend"
+    )
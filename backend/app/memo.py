@@ -0,0 +1,55 @@
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from .config import settings
+
+
+class BeanMemo:
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._generation = 0
+        # Versions come from one counter, so a bean whose version was evicted falls
+        # back to the floor, which is at least as new as anything it replaced.
+        self._counter = 0
+        self._floor = 0
+        self._versions: OrderedDict[str, int] = OrderedDict()
+        self._values: OrderedDict[str, tuple[int, int, Any]] = OrderedDict()
+
+    def get_or_compute(self, bean_id: str, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            version = (self._generation, self._versions.get(bean_id, self._floor))
+            cached = self._values.get(bean_id)
+            if cached is not None and cached[:2] == version:
+                self._values.move_to_end(bean_id)
+                return cached[2]
+        value = compute()
+        with self._lock:
+            # Only keep the result if no write for this bean committed while computing it.
+            if self.max_entries > 0 and version == (self._generation, self._versions.get(bean_id, self._floor)):
+                self._values[bean_id] = (*version, value)
+                self._values.move_to_end(bean_id)
+                while len(self._values) > self.max_entries:
+                    self._values.popitem(last=False)
+        return value
+
+    def invalidate(self, bean_ids: Iterable[str]) -> None:
+        with self._lock:
+            for bean_id in bean_ids:
+                self._counter += 1
+                self._versions[bean_id] = self._counter
+                self._versions.move_to_end(bean_id)
+                self._values.pop(bean_id, None)
+            while len(self._versions) > self.max_entries:
+                _, evicted = self._versions.popitem(last=False)
+                self._floor = max(self._floor, evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._values.clear()
+
+
+recommended_settings_memo = BeanMemo(settings.bean_memo_entries)
@@ -0,0 +1,195 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Iterable
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+SLOW_QUERY_LOG_CHARS = 1000
+
+_registry: list["Counter | Histogram"] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        self._values: dict[tuple[str, ...], float] = {}
+        _registry.append(self)
+
+    def inc(self, amount: float = 1.0, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # Per label set: a count for each bucket plus +Inf, then the sum.
+        self._values: dict[tuple[str, ...], list[float]] = {}
+        _registry.append(self)
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            state[index] += 1
+            state[-1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            values = sorted((labels, list(state)) for labels, state in self._values.items())
+        for labels, state in values:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), state[:-1]):
+                cumulative += count
+                le = bound if isinstance(bound, str) else f"{bound:g}"
+                bucket_labels = _labels(self.labelnames, labels, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {state[-1]:.6f}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+HTTP_REQUESTS = Counter(
+    "brewnotes_http_requests_total", "HTTP requests by route and status.", ("method", "route", "status")
+)
+HTTP_LATENCY = Histogram(
+    "brewnotes_http_request_duration_seconds", "Time to send the full response.", ("method", "route")
+)
+REQUEST_SQL_STATEMENTS = Histogram(
+    "brewnotes_http_request_sql_statements", "SQL statements run per request.", ("method", "route"), COUNT_BUCKETS
+)
+REQUEST_SQL_SECONDS = Histogram(
+    "brewnotes_http_request_sql_seconds", "Time spent in SQL per request.", ("method", "route")
+)
+SQL_STATEMENTS = Counter("brewnotes_sql_statements_total", "SQL statements executed, including background work.")
+SQL_SECONDS = Counter("brewnotes_sql_seconds_total", "Time spent executing SQL, including background work.")
+SLOW_QUERIES = Counter("brewnotes_sql_slow_queries_total", "Statements slower than SLOW_QUERY_MS.")
+UPLOAD_SECONDS = Histogram("brewnotes_upload_save_seconds", "Time to stream, hash and store an upload.")
+UPLOAD_BYTES = Counter("brewnotes_upload_bytes_total", "Bytes received in uploads.")
+THUMBNAIL_SECONDS = Histogram(
+    "brewnotes_thumbnail_seconds",
+    "Time from scheduling a thumbnail until it is written (inline or in the process pool).",
+    ("mode",),
+)
+
+# Mutable [statement count, seconds] for the request being handled. Threadpool
+# and async sessions run in a copy of the request context, so they share it.
+_request_sql: ContextVar[list | None] = ContextVar("request_sql", default=None)
+
+
+def render_metrics() -> str:
+    lines: list[str] = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def instrument_engine(engine: Engine) -> None:
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _discard_cursor_timer)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    SQL_STATEMENTS.inc()
+    SQL_SECONDS.inc(elapsed)
+    request_sql = _request_sql.get()
+    if request_sql is not None:
+        request_sql[0] += 1
+        request_sql[1] += elapsed
+    if settings.slow_query_ms > 0 and elapsed * 1000 >= settings.slow_query_ms:
+        SLOW_QUERIES.inc()
+        logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, statement[:SLOW_QUERY_LOG_CHARS])
+
+
+def _discard_cursor_timer(context) -> None:
+    started = context.connection.info.get("query_started") if context.connection is not None else None
+    if started:
+        started.pop()
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+        request_sql = [0, 0.0]
+        token = _request_sql.set(request_sql)
+        started = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_sql.reset(token)
+            # Only the matched route template is used as a label, so paths with
+            # ids or static files do not create a series each.
+            route = scope.get("route")
+            route_label = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            HTTP_REQUESTS.inc(1, method, route_label, str(status))
+            HTTP_LATENCY.observe(elapsed, method, route_label)
+            REQUEST_SQL_STATEMENTS.observe(request_sql[0], method, route_label)
+            REQUEST_SQL_SECONDS.observe(request_sql[1], method, route_label)
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Boolean, Date, DateTime, Float, ForeignKey, Integer, JSON, String, Text
+from sqlalchemy import Boolean, Date, DateTime, Float, ForeignKey, Index, Integer, JSON, PrimaryKeyConstraint, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .database import Base
@@ -9,6 +9,7 @@ from .database import Base
 
 class Bean(Base):
     __tablename__ = "beans"
+    __table_args__ = (Index("ix_beans_image_path", "image_path"),)
 
     id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     name: Mapped[str] = mapped_column(String, nullable=False)
@@ -35,6 +36,11 @@ class Bean(Base):
 
 class DrinkLog(Base):
     __tablename__ = "drink_logs"
+    __table_args__ = (
+        Index("ix_drink_logs_created_at_id", "created_at", "id"),
+        Index("ix_drink_logs_bean_id_created_at_id", "bean_id", "created_at", "id"),
+        Index("ix_drink_logs_photo_path", "photo_path"),
+    )
 
     id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
@@ -67,3 +73,60 @@ class DrinkLog(Base):
     thumbnail_path: Mapped[str | None] = mapped_column(String, nullable=True)
 
     bean: Mapped[Bean] = relationship("Bean", back_populates="drinks")
+
+
+class BeanStats(Base):
+    __tablename__ = "bean_stats"
+
+    bean_id: Mapped[str] = mapped_column(String, ForeignKey("beans.id"), primary_key=True)
+    drink_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    rating_sum: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    sweetness_sum: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    bitterness_sum: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    acidity_sum: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    body_mouthfeel_sum: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    balance_sum: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    top_rated_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    top_sweetness_sum: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    top_bitterness_sum: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    top_acidity_sum: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    top_body_mouthfeel_sum: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    top_balance_sum: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class BeanDailyStats(Base):
+    __tablename__ = "bean_daily_stats"
+    __table_args__ = (PrimaryKeyConstraint("bean_id", "day"),)
+
+    bean_id: Mapped[str] = mapped_column(String, ForeignKey("beans.id"))
+    day: Mapped[str] = mapped_column(String)
+    drink_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    rating_sum: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class BeanSettingsStats(Base):
+    __tablename__ = "bean_settings_stats"
+    __table_args__ = (
+        PrimaryKeyConstraint(
+            "bean_id",
+            "temperature_level",
+            "body_level",
+            "order",
+            "coffee_volume_ml",
+            "milk_volume_ml",
+            "strength_level",
+            "grind_setting",
+            "overall_rating",
+        ),
+    )
+
+    bean_id: Mapped[str] = mapped_column(String, ForeignKey("beans.id"))
+    temperature_level: Mapped[str] = mapped_column(String)
+    body_level: Mapped[str] = mapped_column(String)
+    order: Mapped[str] = mapped_column(String)
+    coffee_volume_ml: Mapped[float] = mapped_column(Float)
+    milk_volume_ml: Mapped[float] = mapped_column(Float)
+    strength_level: Mapped[str] = mapped_column(String)
+    grind_setting: Mapped[int] = mapped_column(Integer)
+    overall_rating: Mapped[int] = mapped_column(Integer)
+    drink_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
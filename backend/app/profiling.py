@@ -0,0 +1,197 @@
+import logging
+import re
+import sys
+import threading
+import time
+from collections import Counter as Tally
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import parse_qs
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+TRIGGER_HEADER = b"x-profile"
+TRIGGER_PARAM = "profile"
+REPORT_ROWS = 40
+STATEMENT_CHARS = 160
+
+# Innermost frames of threads that are waiting for work rather than doing it.
+_IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("runners.py", "run"),
+    ("base_events.py", "run_forever"),
+    ("thread.py", "_worker"),
+    ("writer.py", "_run"),
+}
+
+_active: ContextVar["RequestProfile | None"] = ContextVar("active_profile", default=None)
+_profile_lock = threading.Lock()
+
+
+class RequestProfile:
+    def __init__(self, interval_s: float) -> None:
+        self.interval_s = interval_s
+        self.stacks: Tally[tuple[tuple[str, str, int], ...]] = Tally()
+        self.statements: dict[str, list[float]] = {}
+        self._statements_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def record_statement(self, statement: str, elapsed: float) -> None:
+        with self._statements_lock:
+            totals = self.statements.setdefault(statement, [0, 0.0])
+            totals[0] += 1
+            totals[1] += elapsed
+
+    def _sample(self) -> None:
+        # Samples every thread, since request work is spread over the event loop,
+        # the threadpool, the writer thread and aiosqlite's connection threads.
+        own = threading.get_ident()
+        while not self._stopped.wait(self.interval_s):
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                code = frame.f_code
+                if (Path(code.co_filename).name, code.co_name) in _IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_filename, code.co_name, code.co_firstlineno))
+                    frame = frame.f_back
+                self.stacks[tuple(reversed(stack))] += 1
+
+
+def instrument_engine(engine: Engine) -> None:
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _active.get() is not None:
+        context._profile_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    profile = _active.get()
+    started = getattr(context, "_profile_started", None)
+    if profile is not None and started is not None:
+        profile.record_statement(statement, time.perf_counter() - started)
+
+
+def _requested(scope: Scope) -> bool:
+    for name, value in scope["headers"]:
+        if name == TRIGGER_HEADER:
+            return value not in (b"", b"0", b"false")
+    query = scope["query_string"]
+    if TRIGGER_PARAM.encode() not in query:
+        return False
+    values = parse_qs(query.decode("latin-1")).get(TRIGGER_PARAM, [])
+    return any(value not in ("", "0", "false") for value in values)
+
+
+class ProfilingMiddleware:
+    # Only installed when PROFILING_ENABLED is set; requests without the header
+    # or query flag pass straight through.
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not _requested(scope) or not _profile_lock.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self._profile(scope, receive, send)
+        finally:
+            _profile_lock.release()
+
+    async def _profile(self, scope: Scope, receive: Receive, send: Send) -> None:
+        profile = RequestProfile(settings.profiling_interval_ms / 1000)
+        report_path = _report_path(scope)
+        status = 500
+
+        async def send_with_report(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = [*message.get("headers", []), (b"x-profile-report", report_path.name.encode())]
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = _active.set(profile)
+        profile.start()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_report)
+        finally:
+            wall = time.perf_counter() - started
+            profile.stop()
+            _active.reset(token)
+            try:
+                _write_report(report_path, scope, status, wall, profile)
+            except OSError:
+                logger.exception("Could not write profile report %s", report_path)
+
+
+def _report_path(scope: Scope) -> Path:
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", scope["path"]).strip("-")[:60] or "root"
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+    return settings.data_dir / "profiles" / f"{stamp}-{scope['method']}-{slug}.txt"
+
+
+def _frame_label(frame: tuple[str, str, int]) -> str:
+    filename, name, line = frame
+    return f"{name} ({'/'.join(Path(filename).parts[-2:])}:{line})"
+
+
+def _write_report(path: Path, scope: Scope, status: int, wall: float, profile: RequestProfile) -> None:
+    sql_count = sum(int(count) for count, _ in profile.statements.values())
+    sql_time = sum(total for _, total in profile.statements.values())
+    samples = sum(profile.stacks.values())
+    query = scope["query_string"].decode("latin-1")
+    lines = [
+        f"{scope['method']} {scope['path']}{'?' + query if query else ''} -> {status}",
+        f"wall {wall * 1000:.1f} ms | sql {sql_time * 1000:.1f} ms in {sql_count} statements "
+        f"| python {max(wall - sql_time, 0.0) * 1000:.1f} ms",
+        f"{samples} busy-thread samples every {profile.interval_s * 1000:g} ms",
+        "",
+        "SQL statements by total time",
+        f"{'total ms':>10} {'count':>6}  statement",
+    ]
+    by_time = sorted(profile.statements.items(), key=lambda item: item[1][1], reverse=True)
+    for statement, (count, total) in by_time[:REPORT_ROWS]:
+        lines.append(f"{total * 1000:>10.2f} {int(count):>6}  {' '.join(statement.split())[:STATEMENT_CHARS]}")
+
+    own: Tally[tuple[str, str, int]] = Tally()
+    cumulative: Tally[tuple[str, str, int]] = Tally()
+    for stack, count in profile.stacks.items():
+        own[stack[-1]] += count
+        for frame in set(stack):
+            cumulative[frame] += count
+    sections = (("Python functions by own samples", own), ("Python functions by cumulative samples", cumulative))
+    for title, tally in sections:
+        lines += ["", title, f"{'samples':>8} {'%':>6}  function"]
+        for frame, count in tally.most_common(REPORT_ROWS):
+            lines.append(f"{count:>8} {100 * count / max(samples, 1):>6.1f}  {_frame_label(frame)}")
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("\n".join(lines) + "\n")
+    # Collapsed stacks for flamegraph.pl or speedscope.
+    folded = [f"{';'.join(map(_frame_label, stack))} {count}" for stack, count in profile.stacks.items()]
+    path.with_suffix(".folded").write_text("\n".join(folded) + "\n")
@@ -0,0 +1,77 @@
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+from .config import settings
+from .images import render_image
+
+
+class RenditionCache:
+    def __init__(self, root: Path, max_bytes: int) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes: int | None = None
+
+    def key(self, source: Path, width: int, fmt: str, immutable: bool = False) -> str:
+        if immutable:
+            # The path of a content-addressed object already names its content, and its
+            # mtime is touched whenever the same bytes are uploaded again.
+            raw = f"{source}:{width}:{fmt}"
+        else:
+            stat = source.stat()
+            raw = f"{source}:{stat.st_size}:{stat.st_mtime_ns}:{width}:{fmt}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def path_for(self, key: str, fmt: str) -> Path:
+        return self.root / key[:2] / f"{key}.{fmt}"
+
+    def get_or_render(self, source: Path, width: int, fmt: str, key: str) -> bytes:
+        # Renditions are small, so they are returned as bytes; a concurrent eviction
+        # can then never pull the file out from under a response.
+        path = self.path_for(key, fmt)
+        try:
+            content = path.read_bytes()
+        except FileNotFoundError:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            render_image(source, path, width, fmt)
+            content = path.read_bytes()
+            self._track(len(content))
+        else:
+            # The mtime doubles as the LRU clock.
+            os.utime(path)
+        return content
+
+    def _track(self, added_bytes: int) -> None:
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(path.stat().st_size for path in self._files())
+            else:
+                self._total_bytes += added_bytes
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        # Trim to 90% of the cap so a full cache does not evict on every render.
+        target = int(self.max_bytes * 0.9)
+        entries = []
+        for path in self._files():
+            stat = path.stat()
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= target:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+        self._total_bytes = total
+
+    def _files(self) -> list[Path]:
+        if not self.root.exists():
+            return []
+        return [path for path in self.root.rglob("*") if path.is_file() and not path.name.startswith(".")]
+
+
+rendition_cache = RenditionCache(settings.data_dir / "renditions", settings.rendition_cache_bytes)
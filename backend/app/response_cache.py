@@ -0,0 +1,129 @@
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Iterable
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any
+
+from fastapi import Request, Response
+from pydantic_core import to_json
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from .config import settings
+
+
+class ResponseCache:
+    # Rendered read responses tagged with the data version they were built from.
+    # Every committed write bumps the global version, and drink writes also bump
+    # the version of their bean, so a repeat read of unchanged data is answered
+    # from memory (or with a 304) after comparing version numbers.
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._epoch = f"{time.time_ns():x}"
+        self._generation = 0
+        self._version = 0
+        self._modified = time.time()
+        self._bean_versions: dict[str, tuple[int, float]] = {}
+        self._entries: OrderedDict[tuple[str, str], tuple[str, bytes]] = OrderedDict()
+
+    def validators(self, bean_id: str | None = None) -> tuple[str, float]:
+        with self._lock:
+            if bean_id is None:
+                return f'W/"{self._epoch}-{self._version}"', self._modified
+            version, modified = self._bean_versions.get(bean_id, (0, self._modified))
+            return f'W/"{self._epoch}-{self._generation}-{version}"', modified
+
+    def bump(self) -> None:
+        with self._lock:
+            self._version += 1
+            self._modified = time.time()
+
+    def invalidate(self, bean_ids: Iterable[str]) -> None:
+        with self._lock:
+            now = time.time()
+            for bean_id in bean_ids:
+                version, _ = self._bean_versions.get(bean_id, (0, now))
+                self._bean_versions[bean_id] = (version + 1, now)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._modified = time.time()
+            self._bean_versions.clear()
+            self._entries.clear()
+
+    async def respond(
+        self, request: Request, build: Callable[[], Awaitable[Any]], bean_id: str | None = None
+    ) -> Response:
+        # The tag is read before building, so a write that commits meanwhile
+        # leaves the entry with an older tag that will not match again.
+        etag, modified = self.validators(bean_id)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        # Last-Modified has one-second resolution, so it is only a safe validator
+        # once no further write can land in the same second.
+        if _settled(modified):
+            headers["Last-Modified"] = formatdate(modified, usegmt=True)
+        if _not_modified(request, etag, modified):
+            return Response(status_code=304, headers=headers)
+
+        key = (request.url.path, request.url.query)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached[0] == etag:
+                self._entries.move_to_end(key)
+                return Response(cached[1], media_type="application/json", headers=headers)
+
+        body = to_json(await build())
+        if self.max_entries > 0:
+            with self._lock:
+                self._entries[key] = (etag, body)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return Response(body, media_type="application/json", headers=headers)
+
+
+def _not_modified(request: Request, etag: str, modified: float) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or etag.removeprefix("W/") in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None and _settled(modified):
+        try:
+            return int(modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _settled(modified: float) -> bool:
+    return int(modified) < int(time.time())
+
+
+response_cache = ResponseCache(settings.response_cache_entries)
+
+
+@event.listens_for(Session, "after_flush")
+def _note_flushed_writes(db: Session, flush_context: Any) -> None:
+    if db.new or db.dirty or db.deleted:
+        db.info["data_changed"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _note_executed_writes(state: ORMExecuteState) -> None:
+    if state.is_insert or state.is_update or state.is_delete:
+        state.session.info["data_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_data_version(db: Session) -> None:
+    if db.info.pop("data_changed", False):
+        response_cache.bump()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_data_changes(db: Session) -> None:
+    db.info.pop("data_changed", None)
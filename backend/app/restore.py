@@ -0,0 +1,304 @@
+import ast
+import csv
+import functools
+import io
+import json
+import os
+import shutil
+import sys
+import uuid
+import zipfile
+from collections.abc import Callable, Iterable, Iterator
+from datetime import date, datetime
+from pathlib import Path
+from typing import IO, Any
+
+from sqlalchemy import JSON, Boolean, Column, Date, DateTime, Float, Integer, Table
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .database import SessionLocal
+from .models import Bean, DrinkLog
+from .stats import rebuild_bean_stats
+
+RESTORE_BATCH_SIZE = 1000
+READ_CHUNK_SIZE = 64 * 1024
+UPLOAD_PREFIX = "uploads/"
+PATH_COLUMNS = {"image_path", "thumbnail_path", "photo_path"}
+
+
+class RestoreError(Exception):
+    pass
+
+
+def restore_file(source: IO[bytes], upload_dir: Path | None = None) -> dict:
+    upload_dir = upload_dir or settings.upload_dir
+    if zipfile.is_zipfile(source):
+        source.seek(0)
+        with zipfile.ZipFile(source) as archive:
+            return restore_archive(archive, upload_dir)
+    source.seek(0)
+    sections = iter_export_json(io.TextIOWrapper(source, encoding="utf-8"))
+    with SessionLocal() as db:
+        return {**_restore_rows(db, sections, upload_dir, from_csv=False), "uploads": 0}
+
+
+def restore_archive(archive: zipfile.ZipFile, upload_dir: Path) -> dict:
+    names = set(archive.namelist())
+    if "export.json" not in names and not {"beans.csv", "drinks.csv"} <= names:
+        raise RestoreError("Archive contains neither export.json nor beans.csv/drinks.csv")
+    # Rows are matched to upload files by path, so the files are restored first and
+    # the new ones are removed again if the rows cannot be committed.
+    written: list[Path] = []
+    try:
+        restored = restore_uploads(archive, upload_dir, written)
+        with SessionLocal() as db:
+            if "export.json" in names:
+                with archive.open("export.json") as raw:
+                    sections = iter_export_json(io.TextIOWrapper(raw, encoding="utf-8"))
+                    result = _restore_rows(db, sections, upload_dir, from_csv=False)
+            else:
+                with archive.open("beans.csv") as beans, archive.open("drinks.csv") as drinks:
+                    sections = _iter_csv_sections(
+                        ("beans", io.TextIOWrapper(beans, encoding="utf-8", newline="")),
+                        ("drinks", io.TextIOWrapper(drinks, encoding="utf-8", newline="")),
+                    )
+                    result = _restore_rows(db, sections, upload_dir, from_csv=True)
+    except Exception:
+        for path in written:
+            path.unlink(missing_ok=True)
+        raise
+    result["uploads"] = restored
+    return result
+
+
+def restore_uploads(archive: zipfile.ZipFile, upload_dir: Path, written: list[Path] | None = None) -> int:
+    root = upload_dir.resolve()
+    restored = 0
+    for info in archive.infolist():
+        if info.is_dir() or not info.filename.startswith(UPLOAD_PREFIX):
+            continue
+        relative = info.filename[len(UPLOAD_PREFIX) :]
+        target = (root / relative).resolve()
+        if not target.is_relative_to(root) or target == root:
+            continue
+        restored += 1
+        existed = target.exists()
+        if existed and target.stat().st_size == info.file_size:
+            continue
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_name(f".{target.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            with archive.open(info) as src, tmp_path.open("wb") as dst:
+                shutil.copyfileobj(src, dst, READ_CHUNK_SIZE)
+            os.replace(tmp_path, target)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        if written is not None and not existed:
+            written.append(target)
+    return restored
+
+
+def _restore_rows(db: Session, sections: Iterable[tuple[str, dict]], upload_dir: Path, from_csv: bool) -> dict:
+    # Everything is written in one transaction and the rollups are rebuilt once,
+    # so a failed restore leaves the database untouched.
+    tables = {"beans": Bean.__table__, "drinks": DrinkLog.__table__}
+    converters = {section: _row_converter(table, upload_dir, from_csv) for section, table in tables.items()}
+    counts = {"beans": 0, "drinks": 0}
+    batch: list[dict] = []
+    batch_section: str | None = None
+    try:
+        for section, record in sections:
+            if section != batch_section and batch:
+                _upsert_rows(db, tables[batch_section], batch)
+                batch = []
+            batch_section = section
+            batch.append(converters[section](record))
+            counts[section] += 1
+            if len(batch) >= RESTORE_BATCH_SIZE:
+                _upsert_rows(db, tables[section], batch)
+                batch = []
+        if batch:
+            _upsert_rows(db, tables[batch_section], batch)
+        rebuild_bean_stats(db)
+        db.commit()
+    except (ValueError, SyntaxError, KeyError) as exc:
+        db.rollback()
+        raise RestoreError(f"Invalid export data: {exc}") from exc
+    except IntegrityError as exc:
+        db.rollback()
+        raise RestoreError(f"Invalid {batch_section} data: {exc.orig}") from exc
+    return counts
+
+
+def _upsert_rows(db: Session, table: Table, rows: list[dict]) -> None:
+    stmt = sqlite_insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["id"],
+        set_={column.name: stmt.excluded[column.name] for column in table.c if column.name != "id"},
+    )
+    db.execute(stmt, rows)
+
+
+def _row_converter(table: Table, upload_dir: Path, from_csv: bool) -> Callable[[dict], dict]:
+    # Converters are resolved once per table rather than per value.
+    converters = [
+        (column.name, _value_converter(column.type, from_csv), _column_default(column)) for column in table.c
+    ]
+    remap = functools.lru_cache(maxsize=4096)(lambda value: _remap_upload_path(value, upload_dir))
+    missing = object()
+
+    def convert(record: dict) -> dict:
+        row = {}
+        for name, converter, default in converters:
+            value = record.get(name, missing)
+            if value is missing:
+                value = default()
+            elif value is None or (from_csv and value == ""):
+                value = None
+            else:
+                value = converter(value)
+                if name in PATH_COLUMNS:
+                    value = remap(value)
+            row[name] = value
+        return row
+
+    return convert
+
+
+def _column_default(column: Column) -> Callable[[], Any]:
+    default = column.default
+    if default is None:
+        return lambda: None
+    if default.is_callable:
+        return lambda: default.arg(None)
+    return lambda: default.arg
+
+
+def _value_converter(column_type: Any, from_csv: bool) -> Callable[[Any], Any]:
+    if isinstance(column_type, DateTime):
+        return lambda value: value if isinstance(value, datetime) else datetime.fromisoformat(value)
+    if isinstance(column_type, Date):
+        return lambda value: value if isinstance(value, date) else date.fromisoformat(value)
+    if isinstance(column_type, Boolean):
+        return lambda value: value if isinstance(value, bool) else value in ("True", "true", "1")
+    if isinstance(column_type, Integer):
+        return int
+    if isinstance(column_type, Float):
+        return float
+    if isinstance(column_type, JSON):
+        # CSV exports write dict columns with their Python repr.
+        parse = ast.literal_eval if from_csv else json.loads
+        return lambda value: parse(value) if isinstance(value, str) else value
+    return lambda value: value
+
+
+def _remap_upload_path(value: str, upload_dir: Path) -> str:
+    # Stored paths are absolute on the source instance; match them to files in
+    # this instance's upload dir by their longest suffix.
+    path = Path(value)
+    if path.is_relative_to(upload_dir):
+        return value
+    parts = path.parts
+    for start in range(1, len(parts)):
+        candidate = upload_dir.joinpath(*parts[start:])
+        if candidate.is_file():
+            return str(candidate)
+    return value
+
+
+def _iter_csv_sections(*sources: tuple[str, IO[str]]) -> Iterator[tuple[str, dict]]:
+    for section, handle in sources:
+        for record in csv.DictReader(handle):
+            yield section, record
+
+
+def iter_export_json(handle: IO[str]) -> Iterator[tuple[str, dict]]:
+    reader = _JsonStreamReader(handle)
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+    while True:
+        section = reader.value()
+        reader.expect(":")
+        if section in ("beans", "drinks"):
+            reader.expect("[")
+            if reader.peek() != "]":
+                while True:
+                    yield section, reader.value()
+                    if reader.peek() == "]":
+                        break
+                    reader.expect(",")
+            reader.expect("]")
+        else:
+            reader.value()
+        if reader.peek() == "}":
+            return
+        reader.expect(",")
+
+
+class _JsonStreamReader:
+    # Pulls fixed-size chunks and decodes one JSON value at a time, so only the
+    # current element is ever held in memory.
+    def __init__(self, handle: IO[str]) -> None:
+        self.handle = handle
+        self.decoder = json.JSONDecoder()
+        self.text = ""
+        self.position = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.handle.read(READ_CHUNK_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        self.text = self.text[self.position :] + chunk
+        self.position = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self.position < len(self.text) and self.text[self.position].isspace():
+                self.position += 1
+            if self.position < len(self.text):
+                return self.text[self.position]
+            if not self._fill():
+                raise RestoreError("Unexpected end of export.json")
+
+    def expect(self, token: str) -> None:
+        if self.peek() != token:
+            raise RestoreError(f"Expected {token!r} in export.json")
+        self.position += 1
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.text, self.position)
+            except json.JSONDecodeError as exc:
+                if self._fill():
+                    continue
+                raise RestoreError(f"Invalid export.json: {exc.msg}") from exc
+            if end == len(self.text) and self._fill():
+                # A scalar at the end of the buffer may continue in the next chunk.
+                continue
+            self.position = end
+            return value
+
+
+def main(argv: list[str]) -> int:
+    if len(argv) != 1:
+        print("usage: python -m app.restore <export.zip|export.json>", file=sys.stderr)
+        return 2
+    with open(argv[0], "rb") as source:
+        result = restore_file(source)
+    print(", ".join(f"{key}: {value}" for key, value in result.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
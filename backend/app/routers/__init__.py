@@ -1,3 +1,3 @@
-from . import analytics, beans, drinks, export
+from . import analytics, beans, drinks, export, renditions
 
-__all__ = ["analytics", "beans", "drinks", "export"]
+__all__ = ["analytics", "beans", "drinks", "export", "renditions"]
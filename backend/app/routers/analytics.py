@@ -1,15 +1,24 @@
-from fastapi import APIRouter, Depends
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Request, Response
 from sqlalchemy import func
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 
-from ..deps import get_db
+from ..analytics_engine import compute_global_series
+from ..deps import AsyncDb, get_async_db
 from ..models import DrinkLog
+from ..response_cache import response_cache
+from ..schemas import DashboardOut, GlobalAnalyticsSeries
 
 router = APIRouter(prefix="/api/analytics", tags=["analytics"])
 
 
-@router.get("")
-def global_analytics(db: Session = Depends(get_db)) -> dict:
+@router.get("", response_model=dict)
+async def global_analytics(request: Request, db: AsyncDb = Depends(get_async_db)) -> Response:
+    return await response_cache.respond(request, lambda: db.run_sync(_global_analytics))
+
+
+def _global_analytics(db: Session) -> dict:
     total_drinks = db.query(func.count(DrinkLog.id)).scalar() or 0
     avg_rating = db.query(func.avg(DrinkLog.overall_rating)).scalar() or 0
     recent_drinks = (
@@ -31,3 +40,43 @@ def global_analytics(db: Session = Depends(get_db)) -> dict:
         "recent_drinks": [drink.id for drink in recent_drinks],
         "hall_of_fame": [drink.id for drink in hall_of_fame],
     }
+
+
+@router.get("/series", response_model=GlobalAnalyticsSeries)
+async def global_series(
+    request: Request, bucket: Literal["day", "week", "month"] = "day", db: AsyncDb = Depends(get_async_db)
+) -> Response:
+    return await response_cache.respond(request, lambda: db.run_sync(compute_global_series, bucket))
+
+
+@router.get("/dashboard", response_model=DashboardOut)
+async def dashboard(request: Request, db: AsyncDb = Depends(get_async_db)) -> Response:
+    return await response_cache.respond(request, lambda: db.run_sync(_dashboard))
+
+
+def _dashboard(db: Session) -> DashboardOut:
+    total_drinks, avg_rating = db.query(func.count(DrinkLog.id), func.avg(DrinkLog.overall_rating)).one()
+    recent_drinks = (
+        db.query(DrinkLog)
+        .options(joinedload(DrinkLog.bean))
+        .order_by(DrinkLog.created_at.desc())
+        .limit(10)
+        .all()
+    )
+    hall_of_fame = (
+        db.query(DrinkLog)
+        .options(joinedload(DrinkLog.bean))
+        .filter(DrinkLog.created_at >= func.datetime("now", "-30 days"))
+        .order_by(DrinkLog.overall_rating.desc())
+        .limit(5)
+        .all()
+    )
+    return DashboardOut.model_validate(
+        {
+            "total_drinks": total_drinks or 0,
+            "average_rating": float(avg_rating or 0),
+            "recent_drinks": recent_drinks,
+            "hall_of_fame": hall_of_fame,
+        },
+        from_attributes=True,
+    )
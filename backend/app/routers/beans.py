@@ -1,26 +1,42 @@
 from datetime import datetime
 from pathlib import Path
-from typing import Any
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from fastapi import APIRouter, Depends, File, HTTPException, Request, Response, UploadFile
 from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
-from ..config import settings
-from ..deps import get_db
-from ..models import Bean, DrinkLog
+from ..analytics_engine import compute_bean_analytics
+from ..deps import AsyncDb, get_async_db, get_db
+from ..memo import recommended_settings_memo
+from ..models import Bean, BeanSettingsStats
+from ..response_cache import response_cache
 from ..schemas import BeanAnalytics, BeanCreate, BeanOut, BeanUpdate, RecommendedSettings
-from ..utils import save_upload
+from ..serialization import RowSerializer, json_response, parse_fields
+from ..stats import SETTINGS_FIELDS, TOP_RATED_MIN
+from ..utils import content_dir, release_uploads, save_upload
 
 router = APIRouter(prefix="/api/beans", tags=["beans"])
 
+BEAN_ROWS = RowSerializer(BeanOut, Bean.__table__)
+
 
 @router.get("", response_model=list[BeanOut])
-def list_beans(include_archived: bool = False, db: Session = Depends(get_db)) -> list[Bean]:
-    query = select(Bean)
+async def list_beans(
+    request: Request,
+    include_archived: bool = False,
+    fields: str | None = None,
+    db: AsyncDb = Depends(get_async_db),
+) -> Response:
+    projection = BEAN_ROWS.only(parse_fields(fields, BEAN_ROWS.fields))
+    query = select(*projection.columns)
     if not include_archived:
         query = query.where(Bean.archived.is_(False))
-    return db.scalars(query.order_by(Bean.name)).all()
+
+    async def build() -> list[dict]:
+        rows = await db.run_sync(lambda session: session.execute(query.order_by(Bean.name)).all())
+        return [projection.to_dict(row) for row in rows]
+
+    return await response_cache.respond(request, build)
 
 
 @router.post("", response_model=BeanOut)
@@ -33,11 +49,13 @@ def create_bean(payload: BeanCreate, db: Session = Depends(get_db)) -> Bean:
 
 
 @router.get("/{bean_id}", response_model=BeanOut)
-def get_bean(bean_id: str, db: Session = Depends(get_db)) -> Bean:
-    bean = db.get(Bean, bean_id)
-    if not bean:
+async def get_bean(bean_id: str, fields: str | None = None, db: AsyncDb = Depends(get_async_db)) -> Response:
+    projection = BEAN_ROWS.only(parse_fields(fields, BEAN_ROWS.fields))
+    query = select(*projection.columns).where(Bean.id == bean_id)
+    row = await db.run_sync(lambda session: session.execute(query).first())
+    if not row:
         raise HTTPException(status_code=404, detail="Bean not found")
-    return bean
+    return json_response(projection.to_dict(row))
 
 
 @router.put("/{bean_id}", response_model=BeanOut)
@@ -45,10 +63,13 @@ def update_bean(bean_id: str, payload: BeanUpdate, db: Session = Depends(get_db)
     bean = db.get(Bean, bean_id)
     if not bean:
         raise HTTPException(status_code=404, detail="Bean not found")
+    previous_image = bean.image_path
     for key, value in payload.model_dump(exclude_unset=True).items():
         setattr(bean, key, value)
     bean.updated_at = datetime.utcnow()
     db.commit()
+    if previous_image != bean.image_path:
+        release_uploads(db, previous_image)
     db.refresh(bean)
     return bean
 
@@ -80,118 +101,65 @@ def upload_bean_photo(bean_id: str, file: UploadFile = File(...), db: Session =
     bean = db.get(Bean, bean_id)
     if not bean:
         raise HTTPException(status_code=404, detail="Bean not found")
-    upload_dir = settings.upload_dir / "beans"
-    thumb_dir = upload_dir / "thumbs"
-    image_path, thumbnail_path = save_upload(file, upload_dir, thumb_dir)
+    previous_image = bean.image_path
+    image_path, thumbnail_path = save_upload(file, content_dir())
     bean.image_path = image_path
     bean.thumbnail_path = thumbnail_path
     db.commit()
+    if previous_image != image_path:
+        release_uploads(db, previous_image)
     db.refresh(bean)
     return bean
 
 
 @router.get("/{bean_id}/analytics", response_model=BeanAnalytics)
-def bean_analytics(bean_id: str, db: Session = Depends(get_db)) -> BeanAnalytics:
-    drinks = db.scalars(select(DrinkLog).where(DrinkLog.bean_id == bean_id)).all()
-    rating_vs_grind = [{"x": drink.grind_setting, "y": drink.overall_rating} for drink in drinks]
-    rating_vs_coffee = [{"x": drink.coffee_volume_ml, "y": drink.overall_rating} for drink in drinks]
-
-    temp_agg = (
-        db.query(DrinkLog.temperature_level, func.avg(DrinkLog.overall_rating))
-        .filter(DrinkLog.bean_id == bean_id)
-        .group_by(DrinkLog.temperature_level)
-        .all()
-    )
-    rating_by_temperature = [
-        {"temperature_level": temp, "average_rating": float(avg or 0)} for temp, avg in temp_agg
-    ]
-
-    timeline = (
-        db.query(func.date(DrinkLog.created_at), func.avg(DrinkLog.overall_rating))
-        .filter(DrinkLog.bean_id == bean_id)
-        .group_by(func.date(DrinkLog.created_at))
-        .order_by(func.date(DrinkLog.created_at))
-        .all()
-    )
-    rating_timeline = [
-        {"date": str(date), "average_rating": float(avg or 0)} for date, avg in timeline
-    ]
-
-    categories = ["sweetness", "bitterness", "acidity", "body_mouthfeel", "balance"]
-    radar = []
-    if drinks:
-        for category in categories:
-            avg_value = sum(getattr(drink, category) for drink in drinks) / len(drinks)
-            top_rated = [drink for drink in drinks if drink.overall_rating >= 4]
-            top_avg = (
-                sum(getattr(drink, category) for drink in top_rated) / len(top_rated)
-                if top_rated
-                else None
-            )
-            radar.append(
-                {
-                    "category": category.replace("_", " ").title(),
-                    "average": avg_value,
-                    "top_rated_average": top_avg,
-                }
-            )
-    return BeanAnalytics(
-        rating_vs_grind=rating_vs_grind,
-        rating_vs_coffee_volume=rating_vs_coffee,
-        rating_by_temperature=rating_by_temperature,
-        rating_timeline=rating_timeline,
-        radar=radar,
+async def bean_analytics(bean_id: str, request: Request, db: AsyncDb = Depends(get_async_db)) -> Response:
+    return await response_cache.respond(
+        request, lambda: db.run_sync(compute_bean_analytics, bean_id), bean_id=bean_id
     )
 
 
 @router.get("/{bean_id}/recommended-settings", response_model=RecommendedSettings)
-def recommended_settings(bean_id: str, db: Session = Depends(get_db)) -> RecommendedSettings:
-    drinks = db.scalars(select(DrinkLog).where(DrinkLog.bean_id == bean_id)).all()
-    considered = [drink for drink in drinks if drink.overall_rating >= 4]
-    if not considered:
-        return RecommendedSettings(recommended=None, highest_rated=None, total_considered=0)
-
-    def settings_tuple(drink: DrinkLog) -> tuple[Any, ...]:
-        return (
-            drink.temperature_level,
-            drink.body_level,
-            drink.order,
-            drink.coffee_volume_ml,
-            drink.milk_volume_ml,
-            drink.strength_level,
-            drink.grind_setting,
-        )
-
-    tuples: dict[tuple[Any, ...], list[DrinkLog]] = {}
-    for drink in considered:
-        tuples.setdefault(settings_tuple(drink), []).append(drink)
-
-    def avg_rating(drinks_list: list[DrinkLog]) -> float:
-        return sum(d.overall_rating for d in drinks_list) / len(drinks_list)
-
-    most_common = max(
-        tuples.items(),
-        key=lambda item: (len(item[1]), avg_rating(item[1])),
+async def recommended_settings(bean_id: str, request: Request, db: AsyncDb = Depends(get_async_db)) -> Response:
+    return await response_cache.respond(
+        request,
+        lambda: db.run_sync(
+            lambda session: recommended_settings_memo.get_or_compute(
+                bean_id, lambda: _recommended_settings(session, bean_id)
+            )
+        ),
+        bean_id=bean_id,
     )
-    highest_rated = max(considered, key=lambda d: d.overall_rating)
 
-    recommended_dict = _settings_dict_from_drink(most_common[1][0])
-    highest_dict = _settings_dict_from_drink(highest_rated)
 
-    return RecommendedSettings(
-        recommended=recommended_dict,
-        highest_rated=highest_dict,
-        total_considered=len(considered),
+def _recommended_settings(db: Session, bean_id: str) -> RecommendedSettings:
+    considered = (
+        BeanSettingsStats.bean_id == bean_id,
+        BeanSettingsStats.overall_rating >= TOP_RATED_MIN,
     )
+    total_considered = db.scalar(select(func.sum(BeanSettingsStats.drink_count)).where(*considered)) or 0
+    if not total_considered:
+        # Raising keeps unknown ids out of the memo.
+        if db.get(Bean, bean_id) is None:
+            raise HTTPException(status_code=404, detail="Bean not found")
+        return RecommendedSettings(recommended=None, highest_rated=None, total_considered=0)
 
+    settings_columns = [getattr(BeanSettingsStats, field) for field in SETTINGS_FIELDS]
+    count = func.sum(BeanSettingsStats.drink_count)
+    average = func.sum(BeanSettingsStats.drink_count * BeanSettingsStats.overall_rating) * 1.0 / count
+    most_common = db.execute(
+        select(*settings_columns)
+        .where(*considered)
+        .group_by(*settings_columns)
+        .order_by(count.desc(), average.desc())
+        .limit(1)
+    ).one()
+    highest_rated = db.execute(
+        select(*settings_columns).where(*considered).order_by(BeanSettingsStats.overall_rating.desc()).limit(1)
+    ).one()
 
-def _settings_dict_from_drink(drink: DrinkLog) -> dict[str, Any]:
-    return {
-        "temperature_level": drink.temperature_level,
-        "body_level": drink.body_level,
-        "order": drink.order,
-        "coffee_volume_ml": drink.coffee_volume_ml,
-        "milk_volume_ml": drink.milk_volume_ml,
-        "strength_level": drink.strength_level,
-        "grind_setting": drink.grind_setting,
-    }
+    return RecommendedSettings(
+        recommended=dict(zip(SETTINGS_FIELDS, most_common)),
+        highest_rated=dict(zip(SETTINGS_FIELDS, highest_rated)),
+        total_considered=total_considered,
+    )
@@ -1,72 +1,200 @@
+import base64
+import json
+from datetime import date, datetime, time, timedelta
 from pathlib import Path
+from typing import Literal
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import Select, select, tuple_
 from sqlalchemy.orm import Session
 
-from ..config import settings
-from ..deps import get_db
-from ..models import DrinkLog
-from ..schemas import DrinkLogCreate, DrinkLogOut, DrinkLogUpdate
-from ..utils import save_upload
+from ..deps import AsyncDb, get_async_db, get_db
+from ..ingest import ingest_drinks
+from ..models import Bean, DrinkLog
+from ..schemas import BeanSummary, BulkIngestResult, DrinkLogCreate, DrinkLogExpanded, DrinkLogOut, DrinkLogUpdate
+from ..serialization import RowSerializer, json_response, parse_fields
+from ..stats import add_drink, remove_drink
+from ..utils import content_dir, release_uploads, save_upload
+from ..writer import write_queue
 
 router = APIRouter(prefix="/api/drinks", tags=["drinks"])
 
+DRINK_ROWS = RowSerializer(DrinkLogOut, DrinkLog.__table__)
+BEAN_SUMMARY_ROWS = RowSerializer(BeanSummary, Bean.__table__, prefix="bean_")
 
-@router.get("", response_model=list[DrinkLogOut])
-def list_drinks(db: Session = Depends(get_db)) -> list[DrinkLog]:
-    return db.scalars(select(DrinkLog).order_by(DrinkLog.created_at.desc())).all()
+
+@router.get("", response_model=list[DrinkLogExpanded])
+async def list_drinks(
+    expand: Literal["bean"] | None = None,
+    fields: str | None = None,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: str | None = None,
+    bean_id: str | None = None,
+    drink_type: str | None = None,
+    made_by: str | None = None,
+    min_rating: int | None = None,
+    max_rating: int | None = None,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    db: AsyncDb = Depends(get_async_db),
+) -> Response:
+    requested = parse_fields(fields, [*DRINK_ROWS.fields, "bean"])
+    projection = DRINK_ROWS.only(requested)
+    query = _drink_query(projection, expand)
+    if bean_id is not None:
+        query = query.where(DrinkLog.bean_id == bean_id)
+    if drink_type is not None:
+        query = query.where(DrinkLog.drink_type == drink_type)
+    if made_by is not None:
+        query = query.where(DrinkLog.made_by == made_by)
+    if min_rating is not None:
+        query = query.where(DrinkLog.overall_rating >= min_rating)
+    if max_rating is not None:
+        query = query.where(DrinkLog.overall_rating <= max_rating)
+    if start_date is not None:
+        query = query.where(DrinkLog.created_at >= datetime.combine(start_date, time.min))
+    if end_date is not None:
+        query = query.where(DrinkLog.created_at < datetime.combine(end_date + timedelta(days=1), time.min))
+    if cursor is not None:
+        created_at, drink_id = _decode_cursor(cursor)
+        query = query.where(tuple_(DrinkLog.created_at, DrinkLog.id) < tuple_(created_at, drink_id))
+    query = query.order_by(DrinkLog.created_at.desc(), DrinkLog.id.desc()).limit(limit + 1)
+    rows = await db.run_sync(lambda session: session.execute(query).all())
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        split = len(projection.fields)
+        headers["X-Next-Cursor"] = _encode_cursor(rows[-1][split], rows[-1][split + 1])
+    return json_response(_drink_dicts(rows, projection, expand, requested), headers)
 
 
 @router.post("", response_model=DrinkLogOut)
-def create_drink(payload: DrinkLogCreate, db: Session = Depends(get_db)) -> DrinkLog:
-    drink = DrinkLog(**payload.model_dump())
-    db.add(drink)
-    db.commit()
-    db.refresh(drink)
-    return drink
+async def create_drink(payload: DrinkLogCreate) -> DrinkLog:
+    def create(db: Session) -> DrinkLog:
+        drink = DrinkLog(**payload.model_dump(), created_at=datetime.utcnow())
+        db.add(drink)
+        add_drink(db, drink)
+        return drink
 
+    return await write_queue.run(create)
 
-@router.get("/{drink_id}", response_model=DrinkLogOut)
-def get_drink(drink_id: str, db: Session = Depends(get_db)) -> DrinkLog:
-    drink = db.get(DrinkLog, drink_id)
-    if not drink:
+
+@router.post("/bulk", response_model=BulkIngestResult)
+async def bulk_create_drinks(request: Request, db: Session = Depends(get_db)) -> dict:
+    return await ingest_drinks(db, request.stream(), request.headers.get("content-type", ""))
+
+
+@router.get("/{drink_id}", response_model=DrinkLogExpanded)
+async def get_drink(
+    drink_id: str,
+    expand: Literal["bean"] | None = None,
+    fields: str | None = None,
+    db: AsyncDb = Depends(get_async_db),
+) -> Response:
+    requested = parse_fields(fields, [*DRINK_ROWS.fields, "bean"])
+    projection = DRINK_ROWS.only(requested)
+    query = _drink_query(projection, expand).where(DrinkLog.id == drink_id)
+    rows = await db.run_sync(lambda session: session.execute(query).all())
+    if not rows:
         raise HTTPException(status_code=404, detail="Drink not found")
-    return drink
+    return json_response(_drink_dicts(rows, projection, expand, requested)[0])
 
 
 @router.put("/{drink_id}", response_model=DrinkLogOut)
-def update_drink(drink_id: str, payload: DrinkLogUpdate, db: Session = Depends(get_db)) -> DrinkLog:
-    drink = db.get(DrinkLog, drink_id)
-    if not drink:
-        raise HTTPException(status_code=404, detail="Drink not found")
-    for key, value in payload.model_dump(exclude_unset=True).items():
-        setattr(drink, key, value)
-    db.commit()
-    db.refresh(drink)
+async def update_drink(drink_id: str, payload: DrinkLogUpdate, db: Session = Depends(get_db)) -> DrinkLog:
+    def update(session: Session) -> tuple[DrinkLog, str | None]:
+        drink = _get_drink_or_404(session, drink_id)
+        previous_photo = drink.photo_path
+        remove_drink(session, drink)
+        for key, value in payload.model_dump(exclude_unset=True).items():
+            setattr(drink, key, value)
+        add_drink(session, drink)
+        return drink, previous_photo
+
+    await run_in_threadpool(_get_drink_or_404, db, drink_id)
+    drink, previous_photo = await write_queue.run(update)
+    if previous_photo != drink.photo_path:
+        await run_in_threadpool(release_uploads, db, previous_photo)
     return drink
 
 
 @router.delete("/{drink_id}")
-def delete_drink(drink_id: str, db: Session = Depends(get_db)) -> dict:
-    drink = db.get(DrinkLog, drink_id)
-    if not drink:
-        raise HTTPException(status_code=404, detail="Drink not found")
-    db.delete(drink)
-    db.commit()
+async def delete_drink(drink_id: str, db: Session = Depends(get_db)) -> dict:
+    def delete(session: Session) -> str | None:
+        drink = _get_drink_or_404(session, drink_id)
+        remove_drink(session, drink)
+        session.delete(drink)
+        return drink.photo_path
+
+    await run_in_threadpool(_get_drink_or_404, db, drink_id)
+    photo_path = await write_queue.run(delete)
+    await run_in_threadpool(release_uploads, db, photo_path)
     return {"status": "deleted"}
 
 
 @router.post("/{drink_id}/photo", response_model=DrinkLogOut)
-def upload_drink_photo(drink_id: str, file: UploadFile = File(...), db: Session = Depends(get_db)) -> DrinkLog:
+async def upload_drink_photo(
+    drink_id: str, file: UploadFile = File(...), db: Session = Depends(get_db)
+) -> DrinkLog:
+    await run_in_threadpool(_get_drink_or_404, db, drink_id)
+    image_path, thumbnail_path = await run_in_threadpool(save_upload, file, content_dir())
+
+    def attach(session: Session) -> tuple[DrinkLog, str | None]:
+        drink = _get_drink_or_404(session, drink_id)
+        previous_photo = drink.photo_path
+        drink.photo_path = image_path
+        drink.thumbnail_path = thumbnail_path
+        return drink, previous_photo
+
+    drink, previous_photo = await write_queue.run(attach)
+    if previous_photo != image_path:
+        await run_in_threadpool(release_uploads, db, previous_photo)
+    return drink
+
+
+def _get_drink_or_404(db: Session, drink_id: str) -> DrinkLog:
     drink = db.get(DrinkLog, drink_id)
     if not drink:
         raise HTTPException(status_code=404, detail="Drink not found")
-    upload_dir = settings.upload_dir / "drinks"
-    thumb_dir = upload_dir / "thumbs"
-    image_path, thumbnail_path = save_upload(file, upload_dir, thumb_dir)
-    drink.photo_path = image_path
-    drink.thumbnail_path = thumbnail_path
-    db.commit()
-    db.refresh(drink)
     return drink
+
+
+def _drink_query(projection: RowSerializer, expand: str | None) -> Select:
+    # The keyset columns ride along after the projected fields so paging works
+    # whatever subset of fields was requested.
+    query = select(
+        *projection.columns, DrinkLog.created_at.label("cursor_created_at"), DrinkLog.id.label("cursor_id")
+    )
+    if expand == "bean":
+        query = query.add_columns(*BEAN_SUMMARY_ROWS.columns).outerjoin(Bean, Bean.id == DrinkLog.bean_id)
+    return query
+
+
+def _drink_dicts(
+    rows: list, projection: RowSerializer, expand: str | None, requested: set[str] | None
+) -> list[dict]:
+    bean_start = len(projection.fields) + 2
+    include_bean = requested is None or "bean" in requested
+    drinks = []
+    for row in rows:
+        drink = projection.to_dict(row)
+        if include_bean:
+            drink["bean"] = (
+                BEAN_SUMMARY_ROWS.to_dict(row[bean_start:]) if expand == "bean" and row[bean_start] else None
+            )
+        drinks.append(drink)
+    return drinks
+
+
+def _encode_cursor(created_at: datetime, drink_id: str) -> str:
+    raw = json.dumps([created_at.isoformat(), drink_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        created_at, drink_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), str(drink_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
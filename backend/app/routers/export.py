@@ -1,59 +1,117 @@
-import csv
+import asyncio
 import io
 import json
-import zipfile
-from pathlib import Path
+from collections.abc import Iterator
 
-from fastapi import APIRouter, Depends
-from fastapi.responses import FileResponse, Response
-from sqlalchemy import select
+from fastapi import APIRouter, File, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy import Table, select
 from sqlalchemy.orm import Session
 
-from ..config import settings
-from ..deps import get_db
+from ..database import SessionLocal
 from ..models import Bean, DrinkLog
+from ..schemas import ImportResult
 
 router = APIRouter(prefix="/api", tags=["export"])
 
+EXPORT_BATCH_SIZE = 1000
+
 
 @router.get("/export.json")
-def export_json(db: Session = Depends(get_db)) -> Response:
-    beans = [bean_to_dict(bean) for bean in db.scalars(select(Bean)).all()]
-    drinks = [drink_to_dict(drink) for drink in db.scalars(select(DrinkLog)).all()]
-    payload = {"beans": beans, "drinks": drinks}
-    return Response(content=json.dumps(payload, default=str), media_type="application/json")
+def export_json() -> StreamingResponse:
+    return StreamingResponse(stream_json(), media_type="application/json")
 
 
 @router.get("/export.csv")
-def export_csv(db: Session = Depends(get_db)) -> Response:
-    beans = [bean_to_dict(bean) for bean in db.scalars(select(Bean)).all()]
-    drinks = [drink_to_dict(drink) for drink in db.scalars(select(DrinkLog)).all()]
-    beans_csv = dicts_to_csv(beans)
-    drinks_csv = dicts_to_csv(drinks)
-    combined = f"# beans.csv\n{beans_csv}\n# drinks.csv\n{drinks_csv}"
-    return Response(content=combined, media_type="text/plain")
+def export_csv() -> StreamingResponse:
+    return StreamingResponse(stream_csv(), media_type="text/plain")
 
 
 @router.get("/export.zip")
-def export_zip(db: Session = Depends(get_db)) -> FileResponse:
-    beans = [bean_to_dict(bean) for bean in db.scalars(select(Bean)).all()]
-    drinks = [drink_to_dict(drink) for drink in db.scalars(select(DrinkLog)).all()]
-    export_path = settings.data_dir / "export.zip"
-    with zipfile.ZipFile(export_path, "w", compression=zipfile.ZIP_DEFLATED) as zip_file:
-        zip_file.writestr("export.json", json.dumps({"beans": beans, "drinks": drinks}, default=str))
-        zip_file.writestr("beans.csv", dicts_to_csv(beans))
-        zip_file.writestr("drinks.csv", dicts_to_csv(drinks))
-        uploads_dir = settings.upload_dir
-        if uploads_dir.exists():
-            for path in uploads_dir.rglob("*"):
-                if path.is_file():
-                    zip_file.write(path, Path("uploads") / path.relative_to(uploads_dir))
+async def export_zip() -> FileResponse:
+    # The archive and restore machinery is imported on first use to keep startup fast.
+    from ..backup import archiver
+
+    # Concurrent requests share one background build; unchanged data reuses the last archive.
+    build = await run_in_threadpool(archiver.request)
+    # Shielded so that a client disconnecting does not cancel the build other requests share.
+    export_path = await asyncio.shield(asyncio.wrap_future(build))
     return FileResponse(export_path, filename="export.zip")
 
 
+@router.post("/import", response_model=ImportResult)
+def import_export(file: UploadFile = File(...)) -> dict:
+    from ..restore import RestoreError, restore_file
+
+    try:
+        return restore_file(file.file)
+    except RestoreError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+def stream_json() -> Iterator[str]:
+    # The request-scoped session is closed before a streamed body is sent, so
+    # the generator owns its own session for the lifetime of the response.
+    with SessionLocal() as db:
+        yield '{"beans": ['
+        yield from _json_array_items(iter_table_dicts(db, Bean.__table__))
+        yield '], "drinks": ['
+        yield from _json_array_items(iter_table_dicts(db, DrinkLog.__table__))
+        yield "]}"
+
+
+def stream_csv() -> Iterator[str]:
+    with SessionLocal() as db:
+        yield "# beans.csv\n"
+        yield from iter_csv(iter_table_dicts(db, Bean.__table__))
+        yield "\n# drinks.csv\n"
+        yield from iter_csv(iter_table_dicts(db, DrinkLog.__table__))
+
+
+def iter_table_dicts(db: Session, table: Table, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[dict]:
+    result = db.execute(select(table).execution_options(yield_per=batch_size))
+    for partition in result.mappings().partitions():
+        for row in partition:
+            yield dict(row)
+
+
+def iter_csv(rows: Iterator[dict], batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[str]:
+    import csv
+
+    buffer = io.StringIO()
+    writer: csv.DictWriter | None = None
+    for index, row in enumerate(rows, start=1):
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=row.keys())
+            writer.writeheader()
+        writer.writerow(row)
+        if index % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _json_array_items(rows: Iterator[dict], batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[str]:
+    chunk: list[str] = []
+    separator = ""
+    for row in rows:
+        chunk.append(json.dumps(row, default=str))
+        if len(chunk) >= batch_size:
+            yield separator + ", ".join(chunk)
+            separator = ", "
+            chunk = []
+    if chunk:
+        yield separator + ", ".join(chunk)
+
+
 def dicts_to_csv(rows: list[dict]) -> str:
     if not rows:
         return ""
+    import csv
+
     buffer = io.StringIO()
     writer = csv.DictWriter(buffer, fieldnames=rows[0].keys())
     writer.writeheader()
@@ -0,0 +1,10 @@
+from fastapi import APIRouter, Response
+
+from ..metrics import CONTENT_TYPE, render_metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics() -> Response:
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
@@ -0,0 +1,40 @@
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+
+from ..config import settings
+from ..renditions import rendition_cache
+from ..utils import content_dir
+
+router = APIRouter(prefix="/uploads", tags=["uploads"])
+
+MEDIA_TYPES = {"webp": "image/webp", "jpeg": "image/jpeg", "png": "image/png"}
+
+
+@router.get("/{path:path}/render")
+def render_upload(
+    path: str,
+    request: Request,
+    w: int = Query(400, ge=16, le=2048),
+    fmt: Literal["webp", "jpeg", "png"] = "webp",
+) -> Response:
+    uploads_root = settings.upload_dir.resolve()
+    source = (uploads_root / path).resolve()
+    if not source.is_relative_to(uploads_root) or not source.is_file():
+        raise HTTPException(status_code=404, detail="Upload not found")
+
+    # Content-addressed objects never change, so their renditions can be cached forever.
+    immutable = source.is_relative_to(content_dir().resolve())
+    cache_control = "public, max-age=31536000, immutable" if immutable else "public, max-age=86400"
+    key = rendition_cache.key(source, w, fmt, immutable)
+    headers = {"ETag": f'"{key}"', "Cache-Control": cache_control}
+    if request.headers.get("if-none-match") in (f'"{key}"', "*"):
+        return Response(status_code=304, headers=headers)
+    try:
+        content = rendition_cache.get_or_render(source, w, fmt, key)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    except OSError:
+        # Covers files Pillow cannot identify as well as truncated or corrupt images.
+        raise HTTPException(status_code=415, detail="Upload cannot be rendered")
+    return Response(content=content, media_type=MEDIA_TYPES[fmt], headers=headers)
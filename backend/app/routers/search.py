@@ -0,0 +1,25 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query, Response
+
+from ..deps import AsyncDb, get_async_db
+from ..schemas import SearchHit
+from ..search import search as run_search
+
+router = APIRouter(prefix="/api/search", tags=["search"])
+
+
+@router.get("", response_model=list[SearchHit])
+async def search(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    type: Literal["bean", "drink"] | None = None,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10_000),
+    db: AsyncDb = Depends(get_async_db),
+) -> list[dict]:
+    kinds = [type] if type is not None else ["bean", "drink"]
+    hits, has_more = await db.run_sync(run_search, q, kinds, limit, offset)
+    if has_more:
+        response.headers["X-Next-Offset"] = str(offset + limit)
+    return hits
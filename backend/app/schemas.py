@@ -1,5 +1,5 @@
 from datetime import date, datetime
-from typing import Any
+from typing import Any, Literal
 
 from pydantic import BaseModel, Field
 
@@ -69,6 +69,11 @@ class DrinkLogCreate(DrinkLogBase):
     pass
 
 
+class DrinkLogBulkItem(DrinkLogBase):
+    id: str | None = None
+    created_at: datetime | None = None
+
+
 class DrinkLogUpdate(DrinkLogBase):
     photo_path: str | None = None
     thumbnail_path: str | None = None
@@ -84,6 +89,42 @@ class DrinkLogOut(DrinkLogBase):
         from_attributes = True
 
 
+class BulkIngestError(BaseModel):
+    index: int
+    detail: str
+
+
+class BulkIngestResult(BaseModel):
+    inserted: int
+    error_count: int
+    errors: list[BulkIngestError]
+
+
+class BeanSummary(BaseModel):
+    id: str
+    name: str
+    roaster: str | None = None
+    origin: str | None = None
+    roast_level: str | None = None
+    decaf: bool = False
+    archived: bool = False
+    thumbnail_path: str | None = None
+
+    class Config:
+        from_attributes = True
+
+
+class DrinkLogExpanded(DrinkLogOut):
+    bean: BeanSummary | None = None
+
+
+class DashboardOut(BaseModel):
+    total_drinks: int
+    average_rating: float
+    recent_drinks: list[DrinkLogExpanded]
+    hall_of_fame: list[DrinkLogExpanded]
+
+
 class AnalyticsPoint(BaseModel):
     x: float
     y: float
@@ -119,6 +160,48 @@ class RecommendedSettings(BaseModel):
     total_considered: int = 0
 
 
+class TimelineBucket(BaseModel):
+    bucket: str
+    drink_count: int
+    average_rating: float
+
+
+class DistributionEntry(BaseModel):
+    key: str | None = None
+    drink_count: int
+    average_rating: float
+
+
+class RatingHistogramEntry(BaseModel):
+    rating: int
+    drink_count: int
+
+
+class GlobalAnalyticsSeries(BaseModel):
+    bucket: str
+    rating_timeline: list[TimelineBucket]
+    by_drink_type: list[DistributionEntry]
+    by_made_by: list[DistributionEntry]
+    by_strength: list[DistributionEntry]
+    rating_histogram: list[RatingHistogramEntry]
+
+
+class ImportResult(BaseModel):
+    beans: int
+    drinks: int
+    uploads: int = 0
+
+
 class ExportResponse(BaseModel):
     beans: list[dict[str, Any]]
     drinks: list[dict[str, Any]]
+
+
+class SearchHit(BaseModel):
+    type: Literal["bean", "drink"]
+    id: str
+    title: str
+    bean_id: str | None = None
+    created_at: datetime | None = None
+    snippet: str
+    rank: float
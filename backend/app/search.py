@@ -0,0 +1,105 @@
+import re
+import sys
+from typing import Literal
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal
+
+SearchKind = Literal["bean", "drink"]
+
+SNIPPET_TOKENS = 12
+SEARCH_INDEXES: dict[SearchKind, str] = {"bean": "beans_fts", "drink": "drink_logs_fts"}
+
+_TERM = re.compile(r"\w+")
+
+# Ranking only reads the FTS index; snippets and row details are fetched for
+# the page being returned, so broad queries do not build a snippet per match.
+_RANKED = {
+    kind: text(f"SELECT rowid, rank FROM {fts} WHERE {fts} MATCH :match ORDER BY rank LIMIT :limit")
+    for kind, fts in SEARCH_INDEXES.items()
+}
+_DETAILS = {
+    "bean": text(
+        "SELECT beans.rowid, beans.id, beans.name, NULL, NULL, "
+        f"snippet(beans_fts, -1, '<mark>', '</mark>', '…', {SNIPPET_TOKENS}) "
+        "FROM beans_fts JOIN beans ON beans.rowid = beans_fts.rowid "
+        "WHERE beans_fts MATCH :match AND beans_fts.rowid IN :rowids"
+    ).bindparams(bindparam("rowids", expanding=True)),
+    "drink": text(
+        "SELECT drink_logs.rowid, drink_logs.id, coalesce(nullif(drink_logs.custom_label, ''), drink_logs.drink_type), "
+        "drink_logs.bean_id, drink_logs.created_at, "
+        f"snippet(drink_logs_fts, -1, '<mark>', '</mark>', '…', {SNIPPET_TOKENS}) "
+        "FROM drink_logs_fts JOIN drink_logs ON drink_logs.rowid = drink_logs_fts.rowid "
+        "WHERE drink_logs_fts MATCH :match AND drink_logs_fts.rowid IN :rowids"
+    ).bindparams(bindparam("rowids", expanding=True)),
+}
+
+
+def match_expression(query: str) -> str | None:
+    # Every word is quoted so user input cannot form FTS5 operators; the last
+    # word matches as a prefix so results update while typing.
+    terms = [f'"{term}"' for term in _TERM.findall(query)]
+    if not terms:
+        return None
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def search(db: Session, query: str, kinds: list[SearchKind], limit: int, offset: int) -> tuple[list[dict], bool]:
+    match = match_expression(query)
+    if match is None:
+        return [], False
+    ranked = []
+    for kind in kinds:
+        rows = db.execute(_RANKED[kind], {"match": match, "limit": offset + limit + 1}).all()
+        ranked += [(rank, kind, rowid) for rowid, rank in rows]
+    ranked.sort()
+    page = ranked[offset : offset + limit]
+
+    details: dict[tuple[str, int], tuple] = {}
+    for kind in kinds:
+        rowids = [rowid for _, hit_kind, rowid in page if hit_kind == kind]
+        if rowids:
+            for row in db.execute(_DETAILS[kind], {"match": match, "rowids": rowids}):
+                details[(kind, row[0])] = row[1:]
+
+    hits = []
+    for rank, kind, rowid in page:
+        # A row deleted or edited between the two queries no longer has details.
+        detail = details.get((kind, rowid))
+        if detail is None:
+            continue
+        hit_id, title, bean_id, created_at, snippet = detail
+        hits.append(
+            {
+                "type": kind,
+                "id": hit_id,
+                "title": title,
+                "bean_id": bean_id,
+                "created_at": created_at,
+                "snippet": snippet,
+                "rank": rank,
+            }
+        )
+    return hits, len(ranked) > offset + limit
+
+
+def rebuild_search_index(db: Session) -> None:
+    for fts in SEARCH_INDEXES.values():
+        db.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+
+def main(argv: list[str]) -> int:
+    if argv != ["rebuild"]:
+        print("usage: python -m app.search rebuild", file=sys.stderr)
+        return 2
+    with SessionLocal() as db:
+        rebuild_search_index(db)
+        db.commit()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
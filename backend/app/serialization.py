@@ -0,0 +1,45 @@
+from collections.abc import Collection, Iterable, Sequence
+from typing import Any
+
+from fastapi import HTTPException, Response
+from pydantic import BaseModel
+from pydantic_core import to_json
+from sqlalchemy import Column, Table
+
+
+class RowSerializer:
+    # List endpoints select only the columns their response schema exposes and
+    # turn result tuples into JSON directly, skipping per-row model validation.
+    # Keys follow the schema's field order so the output matches response_model.
+    def __init__(
+        self, schema: type[BaseModel], table: Table, prefix: str = "", fields: Collection[str] | None = None
+    ) -> None:
+        self.schema = schema
+        self.table = table
+        self.prefix = prefix
+        self.fields = [
+            name for name in schema.model_fields if name in table.c and (fields is None or name in fields)
+        ]
+        self.columns: list[Column] = [table.c[name].label(f"{prefix}{name}") for name in self.fields]
+
+    def only(self, fields: Collection[str] | None) -> "RowSerializer":
+        if fields is None:
+            return self
+        return RowSerializer(self.schema, self.table, self.prefix, fields)
+
+    def to_dict(self, row: Sequence[Any]) -> dict:
+        return dict(zip(self.fields, row))
+
+
+def parse_fields(fields: str | None, allowed: Iterable[str]) -> set[str] | None:
+    if fields is None or not fields.strip():
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = sorted(requested.difference(allowed))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return requested
+
+
+def json_response(content: Iterable[dict] | dict, headers: dict[str, str] | None = None) -> Response:
+    return Response(to_json(content), media_type="application/json", headers=headers)
@@ -0,0 +1,21 @@
+import logging
+
+from . import startup
+from .config import settings
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s:     %(name)s - %(message)s")
+    with startup.phase("schema"):
+        upgraded = startup.ensure_schema()
+    if not upgraded:
+        logging.getLogger(__name__).info("Database schema is at head; skipping migrations")
+    with startup.phase("import"):
+        import uvicorn
+
+        from .main import app
+    uvicorn.run(app, host="0.0.0.0", port=settings.app_port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import ast
+import logging
+import os
+import re
+import sqlite3
+import time
+from collections.abc import Iterator
+from contextlib import closing, contextmanager
+from pathlib import Path
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_DIR = Path(__file__).resolve().parents[1] / "alembic"
+_REVISION_LINE = re.compile(r"^(revision|down_revision)\s*(?::[^=\n]+)?=\s*(.+)$", re.MULTILINE)
+
+
+def _process_age() -> float | None:
+    # Seconds since this process was exec'd, from the kernel's start time.
+    try:
+        uptime = float(Path("/proc/uptime").read_text().split()[0])
+        fields = Path("/proc/self/stat").read_text().rsplit(")", 1)[1].split()
+        return uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+_started = time.perf_counter()
+_phases: list[tuple[str, float]] = []
+_booted = _process_age()
+if _booted is not None:
+    _phases.append(("boot", max(_booted, 0.0)))
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _phases.append((name, time.perf_counter() - started))
+
+
+def report() -> None:
+    total = time.perf_counter() - _started + (_booted or 0.0)
+    breakdown = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in _phases)
+    logger.info("Ready in %.0f ms (%s)", total * 1000, breakdown)
+
+
+def head_revisions() -> set[str]:
+    # Read straight from the migration files so the common case, an up-to-date
+    # database, never has to import Alembic.
+    revisions: set[str] = set()
+    parents: set[str] = set()
+    for path in (ALEMBIC_DIR / "versions").glob("*.py"):
+        values = {name: ast.literal_eval(value.strip()) for name, value in _REVISION_LINE.findall(path.read_text())}
+        revisions.add(values["revision"])
+        down_revision = values.get("down_revision")
+        if isinstance(down_revision, str):
+            parents.add(down_revision)
+        elif down_revision:
+            parents.update(down_revision)
+    return revisions - parents
+
+
+def current_revisions() -> set[str]:
+    if not settings.db_path.exists():
+        return set()
+    uri = f"{settings.db_path.resolve().as_uri()}?mode=ro"
+    with closing(sqlite3.connect(uri, uri=True)) as connection:
+        try:
+            return {row[0] for row in connection.execute("SELECT version_num FROM alembic_version")}
+        except sqlite3.OperationalError:
+            return set()
+
+
+def ensure_schema() -> bool:
+    if current_revisions() == head_revisions():
+        return False
+    from alembic import command
+    from alembic.config import Config
+
+    # No ini file, so Alembic does not reconfigure (and disable) the app's loggers.
+    config = Config()
+    config.set_main_option("script_location", str(ALEMBIC_DIR))
+    config.set_main_option("sqlalchemy.url", f"sqlite:///{settings.db_path}")
+    command.upgrade(config, "head")
+    return True
@@ -0,0 +1,188 @@
+import sys
+from collections.abc import Iterable, Mapping
+from typing import Any
+
+from sqlalchemy import case, delete, event, func, insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal
+from .memo import recommended_settings_memo
+from .models import BeanDailyStats, BeanSettingsStats, BeanStats, DrinkLog
+from .response_cache import response_cache
+
+TOP_RATED_MIN = 4
+TASTING_FIELDS = ("sweetness", "bitterness", "acidity", "body_mouthfeel", "balance")
+SETTINGS_FIELDS = (
+    "temperature_level",
+    "body_level",
+    "order",
+    "coffee_volume_ml",
+    "milk_volume_ml",
+    "strength_level",
+    "grind_setting",
+)
+STAT_FIELDS = ("bean_id", "created_at", "overall_rating", *TASTING_FIELDS, *SETTINGS_FIELDS)
+SETTINGS_KEYS = ("bean_id", *SETTINGS_FIELDS, "overall_rating")
+
+_TOTAL_COLUMNS = (
+    "drink_count",
+    "rating_sum",
+    "top_rated_count",
+    *(f"{field}_sum" for field in TASTING_FIELDS),
+    *(f"top_{field}_sum" for field in TASTING_FIELDS),
+)
+
+
+def add_drink(db: Session, drink: DrinkLog) -> None:
+    _defer_stat_change(db, drink, 1)
+
+
+def remove_drink(db: Session, drink: DrinkLog) -> None:
+    _defer_stat_change(db, drink, -1)
+
+
+def _defer_stat_change(db: Session, drink: DrinkLog, sign: int) -> None:
+    # Values are captured now but written just before commit, so every drink
+    # touched in one transaction shares a single round of rollup upserts.
+    db.info.setdefault("pending_stat_changes", []).append((_stat_values(drink), sign))
+
+
+def _stat_values(drink: DrinkLog) -> dict:
+    return {field: getattr(drink, field) for field in STAT_FIELDS}
+
+
+def apply_drinks(db: Session, rows: Iterable[Mapping[str, Any]], sign: int) -> None:
+    apply_drink_changes(db, ((row, sign) for row in rows))
+
+
+def apply_drink_changes(db: Session, changes: Iterable[tuple[Mapping[str, Any], int]]) -> None:
+    # Deltas are folded per rollup key first, so a batch of drinks costs one
+    # executemany upsert per table rather than one statement per drink.
+    totals: dict[str, dict] = {}
+    daily: dict[tuple, dict] = {}
+    settings_counts: dict[tuple, dict] = {}
+    removed = False
+    for row, sign in changes:
+        removed = removed or sign < 0
+        bean_id = row["bean_id"]
+        rating = row["overall_rating"]
+        top = sign if rating >= TOP_RATED_MIN else 0
+        bean_totals = totals.setdefault(bean_id, dict.fromkeys(_TOTAL_COLUMNS, 0) | {"bean_id": bean_id})
+        bean_totals["drink_count"] += sign
+        bean_totals["rating_sum"] += sign * rating
+        bean_totals["top_rated_count"] += top
+        for field in TASTING_FIELDS:
+            bean_totals[f"{field}_sum"] += sign * row[field]
+            bean_totals[f"top_{field}_sum"] += top * row[field]
+
+        day = row["created_at"].date().isoformat()
+        day_totals = daily.setdefault(
+            (bean_id, day), {"bean_id": bean_id, "day": day, "drink_count": 0, "rating_sum": 0}
+        )
+        day_totals["drink_count"] += sign
+        day_totals["rating_sum"] += sign * rating
+
+        settings_key = tuple(row[key] for key in SETTINGS_KEYS)
+        settings_row = settings_counts.setdefault(
+            settings_key, {**dict(zip(SETTINGS_KEYS, settings_key)), "drink_count": 0}
+        )
+        settings_row["drink_count"] += sign
+
+    if not totals:
+        return
+    db.info.setdefault("changed_bean_ids", set()).update(totals)
+    _upsert_counts(db, BeanStats, ("bean_id",), list(totals.values()))
+    _upsert_counts(db, BeanDailyStats, ("bean_id", "day"), list(daily.values()))
+    _upsert_counts(db, BeanSettingsStats, SETTINGS_KEYS, list(settings_counts.values()))
+
+    if removed:
+        for model in (BeanDailyStats, BeanSettingsStats):
+            db.execute(delete(model).where(model.bean_id.in_(list(totals)), model.drink_count <= 0))
+
+
+def _upsert_counts(db: Session, model: type, keys: tuple[str, ...], rows: list[dict]) -> None:
+    table = model.__table__
+    stmt = sqlite_insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(keys),
+        set_={name: table.c[name] + stmt.excluded[name] for name in rows[0] if name not in keys},
+    )
+    db.execute(stmt, rows)
+
+
+def rebuild_bean_stats(db: Session) -> None:
+    db.info["stats_rebuilt"] = True
+    for model in (BeanStats, BeanDailyStats, BeanSettingsStats):
+        db.execute(delete(model))
+
+    is_top = DrinkLog.overall_rating >= TOP_RATED_MIN
+    totals = [
+        DrinkLog.bean_id,
+        func.count(),
+        func.sum(DrinkLog.overall_rating),
+        func.sum(case((is_top, 1), else_=0)),
+    ]
+    columns = ["bean_id", "drink_count", "rating_sum", "top_rated_count"]
+    for field in TASTING_FIELDS:
+        column = getattr(DrinkLog, field)
+        totals += [func.sum(column), func.sum(case((is_top, column), else_=0))]
+        columns += [f"{field}_sum", f"top_{field}_sum"]
+    db.execute(insert(BeanStats).from_select(columns, select(*totals).group_by(DrinkLog.bean_id)))
+
+    day = func.date(DrinkLog.created_at)
+    db.execute(
+        insert(BeanDailyStats).from_select(
+            ["bean_id", "day", "drink_count", "rating_sum"],
+            select(DrinkLog.bean_id, day, func.count(), func.sum(DrinkLog.overall_rating)).group_by(
+                DrinkLog.bean_id, day
+            ),
+        )
+    )
+
+    key_columns = [getattr(DrinkLog, key) for key in SETTINGS_KEYS]
+    db.execute(
+        insert(BeanSettingsStats).from_select(
+            [*SETTINGS_KEYS, "drink_count"],
+            select(*key_columns, func.count()).group_by(*key_columns),
+        )
+    )
+
+
+@event.listens_for(Session, "before_commit")
+def _apply_pending_stat_changes(db: Session) -> None:
+    pending = db.info.pop("pending_stat_changes", None)
+    if pending:
+        apply_drink_changes(db, pending)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_bean_memos(db: Session) -> None:
+    if db.info.pop("stats_rebuilt", False):
+        recommended_settings_memo.clear()
+        response_cache.clear()
+    changed = db.info.pop("changed_bean_ids", None)
+    if changed:
+        recommended_settings_memo.invalidate(changed)
+        response_cache.invalidate(changed)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_bean_changes(db: Session) -> None:
+    db.info.pop("pending_stat_changes", None)
+    db.info.pop("stats_rebuilt", None)
+    db.info.pop("changed_bean_ids", None)
+
+
+def main(argv: list[str]) -> int:
+    if argv != ["rebuild"]:
+        print("usage: python -m app.stats rebuild", file=sys.stderr)
+        return 2
+    with SessionLocal() as db:
+        rebuild_bean_stats(db)
+        db.commit()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
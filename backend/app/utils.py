@@ -1,9 +1,37 @@
-import io
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 from typing import Tuple
 
-from PIL import Image
-from fastapi import UploadFile
+from fastapi import HTTPException, UploadFile
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .images import create_thumbnail
+from .metrics import THUMBNAIL_SECONDS, UPLOAD_BYTES, UPLOAD_SECONDS
+from .models import Bean, DrinkLog
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Objects touched this recently may be about to gain a reference that is not committed yet.
+RELEASE_GRACE_S = 300
+IMAGE_SUFFIXES = {"JPEG": ".jpg", "MPO": ".jpg", "TIFF": ".tif"}
+
+_thumbnail_pool: ProcessPoolExecutor | None = None
+_thumbnail_pool_lock = threading.Lock()
+_pending_thumbnails: set[Path] = set()
+# Serialises reusing an object in save_upload with the check-and-unlink that
+# removes one, so a reused object cannot be deleted between the two.
+_objects_lock = threading.Lock()
 
 
 def ensure_dirs(*paths: Path) -> None:
@@ -11,30 +39,166 @@ def ensure_dirs(*paths: Path) -> None:
         path.mkdir(parents=True, exist_ok=True)
 
 
-def save_upload(file: UploadFile, upload_dir: Path, thumb_dir: Path) -> Tuple[str, str]:
-    ensure_dirs(upload_dir, thumb_dir)
-    original_name = Path(file.filename or "").name
-    filename = original_name or "upload"
-    target_path = upload_dir / filename
-    counter = 1
-    while target_path.exists():
-        stem = target_path.stem
-        suffix = target_path.suffix
-        target_path = upload_dir / f"{stem}-{counter}{suffix}"
-        counter += 1
+def content_dir() -> Path:
+    return settings.upload_dir / "objects"
+
+
+def save_upload(file: UploadFile, upload_dir: Path) -> Tuple[str, str]:
+    from PIL import Image, UnidentifiedImageError
+
+    started = time.perf_counter()
+    incoming_dir = upload_dir / ".incoming"
+    ensure_dirs(incoming_dir)
+    tmp_path = incoming_dir / uuid.uuid4().hex
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with tmp_path.open("wb") as buffer:
+            while chunk := file.file.read(UPLOAD_CHUNK_SIZE):
+                digest.update(chunk)
+                buffer.write(chunk)
+                size += len(chunk)
+        try:
+            with Image.open(tmp_path) as img:
+                suffix = IMAGE_SUFFIXES.get(img.format, f".{img.format.lower()}")
+        except (UnidentifiedImageError, Image.DecompressionBombError):
+            raise HTTPException(status_code=400, detail="Unsupported image")
 
-    with target_path.open("wb") as buffer:
-        buffer.write(file.file.read())
+        target_path = content_path(upload_dir, digest.hexdigest(), suffix)
+        thumb_path = content_path(upload_dir / "thumbs", digest.hexdigest(), suffix)
+        ensure_dirs(target_path.parent, thumb_path.parent)
+        with _objects_lock:
+            if target_path.exists():
+                os.utime(target_path)
+            else:
+                os.replace(tmp_path, target_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
 
-    thumb_path = thumb_dir / target_path.name
-    create_thumbnail(target_path, thumb_path)
+    if not thumb_path.exists() and thumb_path not in _pending_thumbnails:
+        schedule_thumbnail(target_path, thumb_path)
 
+    UPLOAD_BYTES.inc(size)
+    UPLOAD_SECONDS.observe(time.perf_counter() - started)
     return str(target_path), str(thumb_path)
 
 
-def create_thumbnail(source: Path, destination: Path, size: int = 400) -> None:
-    with Image.open(source) as img:
-        img.thumbnail((size, size))
-        with io.BytesIO() as buffer:
-            img.save(buffer, format=img.format or "JPEG")
-            destination.write_bytes(buffer.getvalue())
+def content_path(root: Path, key: str, suffix: str) -> Path:
+    return root / key[:2] / key[2:4] / f"{key}{suffix}"
+
+
+def release_uploads(db: Session, *paths: str | None) -> None:
+    objects_root = content_dir()
+    for path in paths:
+        if not path:
+            continue
+        image_path = Path(path)
+        if not image_path.is_relative_to(objects_root):
+            continue
+        with _objects_lock:
+            if _reference_count(db, path):
+                continue
+            try:
+                if time.time() - image_path.stat().st_mtime < RELEASE_GRACE_S:
+                    continue
+            except FileNotFoundError:
+                continue
+            image_path.unlink(missing_ok=True)
+            (objects_root / "thumbs" / image_path.relative_to(objects_root)).unlink(missing_ok=True)
+
+
+def sweep_unreferenced_uploads(db: Session) -> int:
+    # Objects skipped by release_uploads during their grace period, and any
+    # thumbnails left without an object, are collected here once they are old enough.
+    objects_root = content_dir()
+    thumbs_root = objects_root / "thumbs"
+    if not objects_root.exists():
+        return 0
+    referenced = set(db.scalars(select(Bean.image_path).where(Bean.image_path.is_not(None))))
+    referenced.update(db.scalars(select(DrinkLog.photo_path).where(DrinkLog.photo_path.is_not(None))))
+    cutoff = time.time() - RELEASE_GRACE_S
+    removed = 0
+    for path in list(objects_root.rglob("*")):
+        if path.is_relative_to(thumbs_root):
+            source = objects_root / path.relative_to(thumbs_root)
+            with _objects_lock:
+                if path.is_file() and not source.exists() and not _recent(path, cutoff):
+                    path.unlink(missing_ok=True)
+            continue
+        if str(path) in referenced:
+            continue
+        with _objects_lock:
+            if not path.is_file() or _recent(path, cutoff):
+                continue
+            path.unlink(missing_ok=True)
+            (thumbs_root / path.relative_to(objects_root)).unlink(missing_ok=True)
+        removed += 1
+    return removed
+
+
+def _recent(path: Path, cutoff: float) -> bool:
+    try:
+        return path.stat().st_mtime >= cutoff
+    except FileNotFoundError:
+        return True
+
+
+def _reference_count(db: Session, path: str) -> int:
+    beans = db.scalar(select(func.count()).select_from(Bean).where(Bean.image_path == path))
+    drinks = db.scalar(select(func.count()).select_from(DrinkLog).where(DrinkLog.photo_path == path))
+    return beans + drinks
+
+
+def schedule_thumbnail(source: Path, destination: Path) -> Future | None:
+    started = time.perf_counter()
+    pool = thumbnail_pool()
+    if pool is None:
+        _create_thumbnail_inline(source, destination, started)
+        return None
+    try:
+        future = pool.submit(create_thumbnail, source, destination)
+    except BrokenProcessPool:
+        shutdown_thumbnail_pool()
+        _create_thumbnail_inline(source, destination, started)
+        return None
+    _pending_thumbnails.add(destination)
+    future.add_done_callback(lambda done: _thumbnail_done(done, source, destination, started))
+    return future
+
+
+def _create_thumbnail_inline(source: Path, destination: Path, started: float) -> None:
+    # Failures are logged rather than raised, as in pool mode, since the object is already stored.
+    try:
+        create_thumbnail(source, destination)
+    except Exception:
+        logger.exception("Thumbnail generation failed for %s", source)
+    THUMBNAIL_SECONDS.observe(time.perf_counter() - started, "inline")
+
+
+def _thumbnail_done(future: Future, source: Path, destination: Path, started: float) -> None:
+    _pending_thumbnails.discard(destination)
+    THUMBNAIL_SECONDS.observe(time.perf_counter() - started, "pool")
+    if future.exception() is not None:
+        logger.error("Thumbnail generation failed for %s", source, exc_info=future.exception())
+
+
+def thumbnail_pool() -> ProcessPoolExecutor | None:
+    global _thumbnail_pool
+    if settings.thumbnail_workers <= 0:
+        return None
+    with _thumbnail_pool_lock:
+        if _thumbnail_pool is None:
+            # Forking a threaded server process is unsafe, so workers are spawned fresh.
+            _thumbnail_pool = ProcessPoolExecutor(
+                max_workers=settings.thumbnail_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _thumbnail_pool
+
+
+def shutdown_thumbnail_pool() -> None:
+    global _thumbnail_pool
+    with _thumbnail_pool_lock:
+        if _thumbnail_pool is not None:
+            _thumbnail_pool.shutdown(wait=True)
+            _thumbnail_pool = None
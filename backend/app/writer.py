@@ -0,0 +1,93 @@
+import asyncio
+import contextvars
+import queue
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from typing import Any, TypeVar
+
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .database import SessionLocal
+
+T = TypeVar("T")
+WriteOp = Callable[[Session], Any]
+QueuedWrite = tuple[contextvars.Context, WriteOp, Future]
+
+_STOP = object()
+
+
+class WriteQueue:
+    # A single writer thread runs queued operations in shared transactions, so
+    # concurrent writes cost one commit (and one journal sync) per batch.
+    def __init__(self, linger_s: float, max_batch: int) -> None:
+        self.linger_s = linger_s
+        self.max_batch = max_batch
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def submit(self, op: Callable[[Session], T]) -> Future:
+        future: Future = Future()
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+            # Ops run in their submitter's context so per-request accounting
+            # (such as SQL metrics) still sees them.
+            self._queue.put((contextvars.copy_context(), op, future))
+        return future
+
+    async def run(self, op: Callable[[Session], T]) -> T:
+        return await asyncio.wrap_future(self.submit(op))
+
+    def stop(self) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is None:
+                return
+            self._queue.put(_STOP)
+        thread.join()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.linger_s
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            batch = [item for item in batch if item[2].set_running_or_notify_cancel()]
+            if batch:
+                self._commit(batch)
+
+    def _commit(self, batch: list[QueuedWrite]) -> None:
+        try:
+            with SessionLocal(expire_on_commit=False) as db:
+                results = [context.run(op, db) for context, op, _ in batch]
+                db.commit()
+        except Exception as exc:
+            # SQLite savepoints are unreliable through pysqlite, so a failing batch
+            # is retried one operation per transaction to isolate the failure.
+            if len(batch) == 1:
+                batch[0][2].set_exception(exc)
+                return
+            for item in batch:
+                self._commit([item])
+            return
+        for (_, _, future), result in zip(batch, results):
+            future.set_result(result)
+
+
+write_queue = WriteQueue(settings.write_linger_ms / 1000, settings.write_batch_max)
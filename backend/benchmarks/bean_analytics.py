@@ -0,0 +1,102 @@
+"""Time bean analytics against beans with a growing number of drink logs.
+
+Run from ``backend/``::
+
+    python -m benchmarks.bean_analytics --sizes 10000 20000 40000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 20_000, 40_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    workdir = Path(tempfile.mkdtemp(prefix="brewnotes-bench-"))
+    os.environ.update(DATA_DIR=str(workdir), DB_PATH=str(workdir / "app.db"), UPLOAD_DIR=str(workdir / "uploads"))
+
+    from app.analytics_engine import compute_bean_analytics, summarize_settings
+    from app.database import Base, SessionLocal, engine
+    from app.models import Bean, DrinkLog
+    from app.stats import rebuild_bean_stats
+
+    Base.metadata.create_all(engine)
+    rng = random.Random(42)
+    print(f"{'drinks':>8} {'rebuild ms':>11} {'endpoint ms':>12} {'columnar pass ms':>17} {'pass ns/log':>12}")
+    for size in args.sizes:
+        with SessionLocal() as db:
+            db.execute(DrinkLog.__table__.delete())
+            bean = Bean(name=f"bench-{size}")
+            db.add(bean)
+            db.flush()
+            start = datetime(2024, 1, 1)
+            db.execute(
+                DrinkLog.__table__.insert(),
+                [_drink_row(rng, bean.id, start + timedelta(minutes=17 * index)) for index in range(size)],
+            )
+            db.commit()
+
+            began = time.perf_counter()
+            rebuild_bean_stats(db)
+            db.commit()
+            rebuild_ms = (time.perf_counter() - began) * 1000
+
+            began = time.perf_counter()
+            for _ in range(args.repeat):
+                compute_bean_analytics(db, bean.id)
+            endpoint_ms = (time.perf_counter() - began) * 1000 / args.repeat
+
+            columns = db.execute(
+                DrinkLog.__table__.select()
+                .with_only_columns(
+                    DrinkLog.temperature_level,
+                    DrinkLog.grind_setting,
+                    DrinkLog.coffee_volume_ml,
+                    DrinkLog.overall_rating,
+                )
+                .where(DrinkLog.bean_id == bean.id)
+            ).all()
+            rows = [(*row, 1) for row in columns]
+            began = time.perf_counter()
+            for _ in range(args.repeat):
+                summarize_settings(rows)
+            pass_ms = (time.perf_counter() - began) * 1000 / args.repeat
+        print(f"{size:>8} {rebuild_ms:>11.1f} {endpoint_ms:>12.2f} {pass_ms:>17.2f} {pass_ms * 1e6 / size:>12.0f}")
+    return 0
+
+
+def _drink_row(rng: random.Random, bean_id: str, created_at: datetime) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "created_at": created_at,
+        "bean_id": bean_id,
+        "drink_type": rng.choice(["Espresso", "Latte", "Cappuccino"]),
+        "temperature_level": rng.choice(["Low", "Medium", "High"]),
+        "body_level": rng.choice(["Light", "Medium", "Full"]),
+        "order": rng.choice(["Coffee first", "Milk first"]),
+        "coffee_volume_ml": float(rng.choice([30, 40, 60, 90])),
+        "milk_volume_ml": float(rng.choice([0, 100, 150, 200])),
+        "strength_level": rng.choice(["1", "2", "3", "4", "5"]),
+        "grind_setting": rng.randint(1, 30),
+        "overall_rating": rng.randint(1, 5),
+        "sweetness": rng.randint(1, 5),
+        "bitterness": rng.randint(1, 5),
+        "acidity": rng.randint(1, 5),
+        "body_mouthfeel": rng.randint(1, 5),
+        "balance": rng.randint(1, 5),
+        "would_make_again": rng.random() < 0.5,
+        "dialed_in": rng.random() < 0.2,
+    }
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,314 @@
+"""Generate a synthetic BrewNotes journal straight into SQLite.
+
+Beans are bought one after another over a few years, with a couple open at
+once. Every bean has a sweet spot of grind and temperature that its ratings
+follow, and drinks cluster around breakfast and early afternoon. About a third
+of the drinks carry tasting notes, so search and exports see realistic text.
+Photos are noisy JPEGs stored content-addressed with thumbnails, like real
+uploads.
+
+The schema is created with the Alembic migrations. Rows are inserted with the
+table triggers dropped, and the derived tables (bean rollups and search index)
+are rebuilt once at the end.
+
+Run from ``backend/``::
+
+    python -m benchmarks.journal /tmp/journal --beans 100 --drinks 1000000 --photos 200
+"""
+import argparse
+import hashlib
+import io
+import json
+import random
+import sqlite3
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+JOURNAL_DAYS = 3 * 365
+INSERT_BATCH_SIZE = 10_000
+PHOTO_SIZE = (1600, 1200)
+MANIFEST = "journal.json"
+
+ORIGINS = {
+    "Ethiopia": ["Guji", "Yirgacheffe", "Sidama", "Limu"],
+    "Kenya": ["Nyeri", "Kirinyaga", "Embu"],
+    "Colombia": ["Huila", "Nariño", "Cauca", "Tolima"],
+    "Brazil": ["Cerrado", "Sul de Minas", "Mogiana"],
+    "Guatemala": ["Huehuetenango", "Antigua", "Atitlán"],
+    "Costa Rica": ["Tarrazú", "West Valley"],
+    "Rwanda": ["Nyamasheke", "Huye"],
+    "Honduras": ["Santa Bárbara", "Marcala"],
+    "Peru": ["Cajamarca", "Cusco"],
+    "Indonesia": ["Sumatra Gayo", "Java"],
+    "Panama": ["Boquete", "Volcán"],
+}
+ROASTERS = ["Northside", "Little Wolf", "Heart", "Onyx", "Square Mile", "Tim Wendelboe", "La Cabra", "Local Roast Co."]
+PROCESSES = ["Washed", "Natural", "Honey", "Anaerobic"]
+ROAST_LEVELS = ["Light", "Medium-Light", "Medium", "Medium-Dark", "Dark"]
+FLAVOURS = [
+    "blueberry", "strawberry", "cherry", "blackcurrant", "lemon", "bergamot", "orange", "peach", "apricot",
+    "jasmine", "rose", "black tea", "honey", "caramel", "toffee", "brown sugar", "milk chocolate",
+    "dark chocolate", "cocoa", "hazelnut", "almond", "vanilla", "cinnamon", "molasses", "red apple", "grape",
+]
+DRINKS = {
+    # drink type: (coffee ml, milk ml)
+    "Espresso": (40.0, 0.0),
+    "Ristretto": (25.0, 0.0),
+    "Lungo": (110.0, 0.0),
+    "Americano": (60.0, 0.0),
+    "Cappuccino": (40.0, 120.0),
+    "Flat White": (60.0, 110.0),
+    "Latte": (40.0, 200.0),
+    "Latte Macchiato": (40.0, 220.0),
+}
+DRINK_WEIGHTS = [20, 3, 4, 10, 18, 15, 22, 8]
+TEMPERATURES = ["Low", "Medium", "High"]
+BODIES = ["Light", "Medium", "Full"]
+ORDERS = ["Coffee first", "Milk first"]
+PEOPLE = ["Alex", "Sam", "Jordan", "Riley"]
+NOTE_TEMPLATES = [
+    "{flavour} up front, {adjective} finish",
+    "a bit {adjective}, try grind {direction}",
+    "{adjective} and sweet, lots of {flavour}",
+    "tastes of {flavour} and {flavour2}",
+    "too {adjective} today, {direction} next time",
+    "great with milk, {flavour} comes through",
+]
+ADJECTIVES = ["bright", "sour", "bitter", "flat", "juicy", "syrupy", "thin", "balanced", "muddy", "clean"]
+DIRECTIONS = ["finer", "coarser", "hotter", "cooler"]
+
+
+def generate_journal(directory: Path, beans: int, drinks: int, photos: int, seed: int = 42) -> dict:
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+
+    from app.search import rebuild_search_index
+    from app.stats import rebuild_bean_stats
+
+    began = time.perf_counter()
+    directory.mkdir(parents=True, exist_ok=True)
+    db_path = directory / "app.db"
+    db_path.unlink(missing_ok=True)
+    upload_dir = directory / "uploads"
+    _migrate(db_path)
+
+    rng = random.Random(seed)
+    end = datetime(2026, 1, 1)
+    start = end - timedelta(days=JOURNAL_DAYS)
+    bean_rows = [_bean_row(rng, index, beans, start) for index in range(beans)]
+    profiles = [(rng.randint(6, 24), rng.choice(TEMPERATURES)) for _ in bean_rows]
+    photo_paths = _write_photos(rng, upload_dir, photos)
+
+    connection = sqlite3.connect(db_path)
+    try:
+        triggers = connection.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name IN ('beans', 'drink_logs')"
+        ).fetchall()
+        for name, _ in triggers:
+            connection.execute(f"DROP TRIGGER {name}")
+        for bean, (image_path, thumbnail_path) in zip(bean_rows, photo_paths):
+            bean["image_path"], bean["thumbnail_path"] = image_path, thumbnail_path
+        _insert(connection, "beans", bean_rows)
+
+        # Photos left over after every bean has one go to evenly spaced drinks.
+        drink_photos = photo_paths[len(bean_rows) :]
+        photo_every = max(1, drinks // len(drink_photos)) if drink_photos else 0
+        batch = []
+        for index, created_at in enumerate(_drink_times(rng, drinks, start)):
+            position = (created_at - start) / (end - start)
+            bean_index = min(beans - 1, max(0, int(position * beans) + rng.choice((-1, 0, 0, 0, 1))))
+            row = _drink_row(rng, bean_rows[bean_index]["id"], created_at, *profiles[bean_index])
+            if photo_every and index % photo_every == 0 and index // photo_every < len(drink_photos):
+                row["photo_path"], row["thumbnail_path"] = drink_photos[index // photo_every]
+            batch.append(row)
+            if len(batch) == INSERT_BATCH_SIZE:
+                _insert(connection, "drink_logs", batch)
+                batch = []
+        _insert(connection, "drink_logs", batch)
+        for _, sql in triggers:
+            connection.execute(sql)
+        connection.commit()
+    finally:
+        connection.close()
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    try:
+        with Session(engine) as db:
+            rebuild_bean_stats(db)
+            rebuild_search_index(db)
+            db.commit()
+    finally:
+        engine.dispose()
+
+    manifest = {
+        "beans": beans,
+        "drinks": drinks,
+        "photos": photos,
+        "seed": seed,
+        "upload_dir": str(upload_dir),
+        "seconds": round(time.perf_counter() - began, 1),
+    }
+    (directory / MANIFEST).write_text(json.dumps(manifest, indent=2))
+    return manifest
+
+
+def load_manifest(directory: Path) -> dict | None:
+    try:
+        return json.loads((directory / MANIFEST).read_text())
+    except FileNotFoundError:
+        return None
+
+
+def _migrate(db_path: Path) -> None:
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config()
+    config.set_main_option("script_location", str(Path(__file__).resolve().parents[1] / "alembic"))
+    config.set_main_option("sqlalchemy.url", f"sqlite:///{db_path}")
+    command.upgrade(config, "head")
+
+
+def _insert(connection: sqlite3.Connection, table: str, rows: list[dict]) -> None:
+    if not rows:
+        return
+    columns = list(rows[0])
+    names = ", ".join(f'"{column}"' for column in columns)
+    placeholders = ", ".join(f":{column}" for column in columns)
+    connection.executemany(f"INSERT INTO {table} ({names}) VALUES ({placeholders})", rows)
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _timestamp(value: datetime) -> str:
+    # The format SQLAlchemy's SQLite DateTime type reads and writes.
+    return value.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def _bean_row(rng: random.Random, index: int, count: int, start: datetime) -> dict:
+    origin = rng.choice(list(ORIGINS))
+    opened = start + timedelta(days=JOURNAL_DAYS * index / max(count, 1))
+    roasted = (opened - timedelta(days=rng.randint(3, 20))).date()
+    return {
+        "id": _uuid(rng),
+        "name": f"{origin} {rng.choice(ORIGINS[origin])}",
+        "roaster": rng.choice(ROASTERS),
+        "origin": origin,
+        "process": rng.choice(PROCESSES),
+        "roast_level": rng.choice(ROAST_LEVELS),
+        "tasting_notes": ", ".join(rng.sample(FLAVOURS, 3)),
+        "roast_date": roasted.isoformat(),
+        "open_date": opened.date().isoformat(),
+        "bag_size_g": rng.choice([250, 340, 500, 1000]),
+        "price": round(rng.uniform(9, 32), 2),
+        "decaf": rng.random() < 0.05,
+        "notes": rng.choice([None, None, "Bought at the market", "Gift", "Subscription bag"]),
+        "image_path": None,
+        "thumbnail_path": None,
+        "archived": index < count - 3,
+        "current_best_settings": None,
+        "created_at": _timestamp(opened),
+        "updated_at": _timestamp(opened),
+    }
+
+
+def _drink_times(rng: random.Random, count: int, start: datetime) -> list[datetime]:
+    times = []
+    for _ in range(count):
+        day = rng.randrange(JOURNAL_DAYS)
+        hour = rng.choices([7, 8, 9, 10, 13, 14, 15, 17, 20], weights=[20, 25, 15, 6, 10, 12, 6, 4, 2])[0]
+        times.append(start + timedelta(days=day, hours=hour, seconds=rng.randrange(3600)))
+    times.sort()
+    return times
+
+
+def _drink_row(
+    rng: random.Random, bean_id: str, created_at: datetime, best_grind: int, best_temperature: str
+) -> dict:
+    drink_type = rng.choices(list(DRINKS), weights=DRINK_WEIGHTS)[0]
+    coffee_ml, milk_ml = DRINKS[drink_type]
+    grind = min(30, max(1, round(rng.gauss(best_grind, 4))))
+    temperature = best_temperature if rng.random() < 0.6 else rng.choice(TEMPERATURES)
+    score = 4.6 - abs(grind - best_grind) / 3 - (temperature != best_temperature) * 0.8 + rng.gauss(0, 0.6)
+    rating = min(5, max(1, round(score)))
+    made_by = rng.choice(PEOPLE)
+    notes = None
+    if rng.random() < 0.35:
+        notes = rng.choice(NOTE_TEMPLATES).format(
+            flavour=rng.choice(FLAVOURS),
+            flavour2=rng.choice(FLAVOURS),
+            adjective=rng.choice(ADJECTIVES),
+            direction=rng.choice(DIRECTIONS),
+        )
+    return {
+        "id": _uuid(rng),
+        "created_at": _timestamp(created_at),
+        "bean_id": bean_id,
+        "drink_type": drink_type,
+        "custom_label": "Weekend special" if rng.random() < 0.03 else None,
+        "made_by": made_by,
+        "rated_by": made_by if rng.random() < 0.7 else rng.choice(PEOPLE),
+        "temperature_level": temperature,
+        "body_level": rng.choice(BODIES),
+        "order": rng.choice(ORDERS) if milk_ml else "Coffee first",
+        "coffee_volume_ml": coffee_ml,
+        "milk_volume_ml": milk_ml,
+        "strength_level": str(rng.randint(1, 5)),
+        "grind_setting": grind,
+        "overall_rating": rating,
+        "sweetness": min(5, max(1, rating + rng.randint(-1, 1))),
+        "bitterness": min(5, max(1, 6 - rating + rng.randint(-1, 1))),
+        "acidity": rng.randint(1, 5),
+        "body_mouthfeel": min(5, max(1, rating + rng.randint(-2, 1))),
+        "balance": min(5, max(1, rating + rng.randint(-1, 0))),
+        "would_make_again": rating >= 4,
+        "dialed_in": rating == 5 and rng.random() < 0.5,
+        "notes": notes,
+        "photo_path": None,
+        "thumbnail_path": None,
+    }
+
+
+def _write_photos(rng: random.Random, upload_dir: Path, count: int) -> list[tuple[str, str]]:
+    from PIL import Image
+
+    from app.images import create_thumbnail
+    from app.utils import content_path
+
+    paths = []
+    for _ in range(count):
+        noise = Image.effect_noise(PHOTO_SIZE, 40).convert("RGB")
+        tint = Image.new("RGB", PHOTO_SIZE, tuple(rng.randrange(256) for _ in range(3)))
+        buffer = io.BytesIO()
+        Image.blend(noise, tint, 0.6).save(buffer, format="JPEG", quality=85)
+        key = hashlib.sha256(buffer.getvalue()).hexdigest()
+        target = content_path(upload_dir / "objects", key, ".jpg")
+        thumbnail = content_path(upload_dir / "objects" / "thumbs", key, ".jpg")
+        target.parent.mkdir(parents=True, exist_ok=True)
+        thumbnail.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(buffer.getvalue())
+        create_thumbnail(target, thumbnail)
+        paths.append((str(target), str(thumbnail)))
+    return paths
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory", type=Path)
+    parser.add_argument("--beans", type=int, default=100)
+    parser.add_argument("--drinks", type=int, default=100_000)
+    parser.add_argument("--photos", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+    manifest = generate_journal(args.directory, args.beans, args.drinks, args.photos, args.seed)
+    print(json.dumps(manifest, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
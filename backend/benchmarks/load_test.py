@@ -0,0 +1,152 @@
+"""Compare request latency with the threadpool and async database sessions.
+
+Starts one uvicorn server per mode (``ASYNC_DB`` off, then on) against the same
+seeded database and drives it with many concurrent clients. Most clients hit
+cheap reads while a few keep requesting the expensive analytics series.
+
+Run from ``backend/``::
+
+    python -m benchmarks.load_test --clients 300 --duration 20
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import httpx
+
+from .bean_analytics import _drink_row
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=300)
+    parser.add_argument("--heavy-clients", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--drinks", type=int, default=50_000)
+    parser.add_argument("--modes", nargs="+", choices=["threadpool", "async"], default=["threadpool", "async"])
+    args = parser.parse_args(argv)
+
+    workdir = Path(tempfile.mkdtemp(prefix="brewnotes-load-"))
+    env = {
+        **os.environ,
+        "DATA_DIR": str(workdir),
+        "DB_PATH": str(workdir / "app.db"),
+        "UPLOAD_DIR": str(workdir / "uploads"),
+    }
+    os.environ.update(env)
+    drink_ids = _seed(args.drinks)
+
+    print(f"{'mode':>10} {'route':>8} {'requests':>9} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for mode in args.modes:
+        port = _free_port()
+        server = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "uvicorn",
+                "app.main:app",
+                "--port",
+                str(port),
+                "--log-level",
+                "warning",
+                "--timeout-keep-alive",
+                "60",
+            ],
+            env={**env, "ASYNC_DB": "1" if mode == "async" else "0"},
+        )
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            _wait_until_up(base_url)
+            latencies = asyncio.run(_drive(base_url, drink_ids, args.clients, args.heavy_clients, args.duration))
+        finally:
+            server.terminate()
+            server.wait()
+        for route, samples in latencies.items():
+            samples.sort()
+            print(
+                f"{mode:>10} {route:>8} {len(samples):>9} {_percentile(samples, 50):>9.1f} "
+                f"{_percentile(samples, 99):>9.1f} {samples[-1] if samples else 0:>9.1f}"
+            )
+    return 0
+
+
+def _seed(size: int) -> list[str]:
+    from app.database import Base, SessionLocal, engine
+    from app.models import Bean, DrinkLog
+    from app.stats import rebuild_bean_stats
+
+    Base.metadata.create_all(engine)
+    rng = random.Random(42)
+    with SessionLocal() as db:
+        beans = [Bean(name=f"load-{index}") for index in range(10)]
+        db.add_all(beans)
+        db.flush()
+        start = datetime(2024, 1, 1)
+        rows = [
+            _drink_row(rng, rng.choice(beans).id, start + timedelta(minutes=7 * index)) for index in range(size)
+        ]
+        db.execute(DrinkLog.__table__.insert(), rows)
+        rebuild_bean_stats(db)
+        db.commit()
+    return [row["id"] for row in rows[:: max(1, size // 1000)]]
+
+
+async def _drive(
+    base_url: str, drink_ids: list[str], clients: int, heavy_clients: int, duration: float
+) -> dict[str, list[float]]:
+    latencies: dict[str, list[float]] = {"health": [], "drink": [], "series": []}
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=clients + heavy_clients, max_keepalive_connections=clients + heavy_clients)
+
+    async def client(client_id: int, http: httpx.AsyncClient) -> None:
+        rng = random.Random(client_id)
+        while time.perf_counter() < deadline:
+            if client_id < heavy_clients:
+                route, url = "series", "/api/analytics/series?bucket=week"
+            elif rng.random() < 0.5:
+                route, url = "health", "/health"
+            else:
+                route, url = "drink", f"/api/drinks/{rng.choice(drink_ids)}"
+            began = time.perf_counter()
+            response = await http.get(url)
+            response.raise_for_status()
+            latencies[route].append((time.perf_counter() - began) * 1000)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as http:
+        await asyncio.gather(*(client(client_id, http) for client_id in range(clients + heavy_clients)))
+    return latencies
+
+
+def _percentile(samples: list[float], percent: float) -> float:
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(len(samples) * percent / 100))]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_up(base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"{base_url}/health", timeout=1).raise_for_status()
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server at {base_url} did not start")
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
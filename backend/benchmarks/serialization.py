@@ -0,0 +1,89 @@
+"""Measure the per-row cost of serializing drink list responses.
+
+Compares the response_model path (load ORM objects, validate them into
+Pydantic models from attributes, dump to JSON-compatible data and encode with
+``json.dumps`` as FastAPI does) with the row serializer used by the list
+endpoints (select the schema's columns and encode the tuples directly).
+
+Run from ``backend/``::
+
+    python -m benchmarks.serialization --rows 500 5000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from .bean_analytics import _drink_row
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[500, 5000])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    workdir = Path(tempfile.mkdtemp(prefix="brewnotes-bench-"))
+    os.environ.update(DATA_DIR=str(workdir), DB_PATH=str(workdir / "app.db"), UPLOAD_DIR=str(workdir / "uploads"))
+
+    from pydantic import TypeAdapter
+    from sqlalchemy import select
+    from sqlalchemy.orm import noload
+
+    from app.database import Base, SessionLocal, engine
+    from app.models import Bean, DrinkLog
+    from app.routers.drinks import DRINK_ROWS
+    from app.schemas import DrinkLogExpanded
+    from app.serialization import json_response
+
+    Base.metadata.create_all(engine)
+    adapter = TypeAdapter(list[DrinkLogExpanded])
+    rng = random.Random(42)
+    print(f"{'rows':>6} {'model µs/row':>13} {'rows µs/row':>12} {'speedup':>8}")
+    with SessionLocal() as db:
+        bean = Bean(name="bench")
+        db.add(bean)
+        db.flush()
+        bean_id = bean.id
+        start = datetime(2024, 1, 1)
+        for size in args.rows:
+            db.execute(DrinkLog.__table__.delete())
+            db.execute(
+                DrinkLog.__table__.insert(),
+                [_drink_row(rng, bean_id, start + timedelta(minutes=index)) for index in range(size)],
+            )
+            db.commit()
+
+            def model_path() -> bytes:
+                drinks = db.scalars(select(DrinkLog).options(noload(DrinkLog.bean))).all()
+                data = adapter.dump_python(adapter.validate_python(drinks, from_attributes=True), mode="json")
+                db.expunge_all()
+                return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+
+            def row_path() -> bytes:
+                rows = db.execute(select(*DRINK_ROWS.columns)).all()
+                return json_response([{**DRINK_ROWS.to_dict(row), "bean": None} for row in rows]).body
+
+            if json.loads(model_path()) != json.loads(row_path()):
+                print("outputs differ", file=sys.stderr)
+                return 1
+            model_us = _per_row_us(model_path, args.repeat, size)
+            row_us = _per_row_us(row_path, args.repeat, size)
+            print(f"{size:>6} {model_us:>13.1f} {row_us:>12.1f} {model_us / row_us:>7.1f}x")
+    return 0
+
+
+def _per_row_us(fn, repeat: int, size: int) -> float:
+    began = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - began) * 1e6 / repeat / size
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
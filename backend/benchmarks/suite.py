@@ -0,0 +1,494 @@
+"""Drive every BrewNotes route in-process against a synthetic journal.
+
+Generates a journal at the chosen scale, or reuses one generated earlier, and
+copies it into a scratch data directory. Requests are then sent straight
+through the ASGI app. Each scenario reports latency percentiles, throughput
+and the peak RSS reached while it ran. A run can be saved as a baseline; later
+runs compared against it fail if a scenario regresses past the thresholds.
+
+Response bodies are counted and discarded rather than buffered, so streaming
+exports of large journals do not inflate the memory figures. The response
+cache is off and thumbnails are made inline unless overridden in the
+environment, so every request measures the work behind it.
+
+Run from ``backend/``::
+
+    python -m benchmarks.suite --scale medium --save-baseline medium
+    python -m benchmarks.suite --scale medium --baseline medium
+"""
+import argparse
+import asyncio
+import fnmatch
+import io
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from .journal import FLAVOURS, generate_journal, load_manifest
+from .journal import _drink_row as journal_drink_row
+
+SCALES = {
+    "small": {"beans": 20, "drinks": 20_000, "photos": 20},
+    "medium": {"beans": 100, "drinks": 200_000, "photos": 100},
+    "large": {"beans": 100, "drinks": 1_000_000, "photos": 500},
+}
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+BULK_ROWS = 1000
+IMPORT_DRINKS = 10_000
+
+
+class Response:
+    def __init__(self, status: int, size: int, body: bytes) -> None:
+        self.status = status
+        self.size = size
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class Client:
+    # A minimal in-process HTTP driver for the ASGI app.
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def request(
+        self, method: str, url: str, body: bytes = b"", content_type: str | None = None, keep_body: bool = False
+    ) -> Response:
+        parts = urlsplit(url)
+        headers = [(b"host", b"bench"), (b"content-length", str(len(body)).encode())]
+        if content_type:
+            headers.append((b"content-type", content_type.encode()))
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": parts.path,
+            "raw_path": parts.path.encode(),
+            "query_string": parts.query.encode(),
+            "root_path": "",
+            "headers": headers,
+            "client": ("127.0.0.1", 0),
+            "server": ("bench", 80),
+        }
+        received = False
+        status = 0
+        size = 0
+        chunks: list[bytes] = []
+
+        async def receive() -> dict:
+            nonlocal received
+            if not received:
+                received = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await asyncio.Event().wait()
+
+        async def send(message: dict) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                chunk = message.get("body", b"")
+                size += len(chunk)
+                if keep_body:
+                    chunks.append(chunk)
+
+        await self.app(scope, receive, send)
+        if status >= 400:
+            raise RuntimeError(f"{method} {url} returned {status}")
+        return Response(status, size, b"".join(chunks))
+
+
+class Scenario:
+    def __init__(
+        self,
+        name: str,
+        send: Callable[[Client, random.Random, int], Awaitable[Response]],
+        heavy: bool = False,
+        setup: Callable[[], None] | None = None,
+    ) -> None:
+        self.name = name
+        self.send = send
+        self.heavy = heavy
+        self.setup = setup
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--beans", type=int)
+    parser.add_argument("--drinks", type=int)
+    parser.add_argument("--photos", type=int)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--journal-dir", type=Path, default=Path(tempfile.gettempdir()) / "brewnotes-journals")
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--heavy-iterations", type=int, default=3)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--only", nargs="+", metavar="PATTERN", help="run scenarios matching these globs")
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    parser.add_argument("--save-baseline", metavar="NAME")
+    parser.add_argument("--baseline", metavar="NAME")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed latency/throughput regression")
+    parser.add_argument("--rss-threshold", type=float, default=0.25, help="allowed peak RSS growth")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore latency changes below this")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch data directory")
+    args = parser.parse_args(argv)
+
+    scale = {key: getattr(args, key) or value for key, value in SCALES[args.scale].items()}
+    run_dir = Path(tempfile.mkdtemp(prefix="brewnotes-suite-"))
+    os.environ.update(DATA_DIR=str(run_dir), DB_PATH=str(run_dir / "app.db"), UPLOAD_DIR=str(run_dir / "uploads"))
+    for key, value in {
+        "RESPONSE_CACHE_ENTRIES": "0",
+        "THUMBNAIL_WORKERS": "0",
+        "SQLITE_MAINTENANCE_INTERVAL_S": "0",
+        "PROFILING_ENABLED": "false",
+    }.items():
+        os.environ.setdefault(key, value)
+
+    try:
+        journal = args.journal_dir / f"{scale['beans']}-{scale['drinks']}-{scale['photos']}-{args.seed}"
+        if load_manifest(journal) is None:
+            print(f"generating journal in {journal}", file=sys.stderr)
+            generate_journal(journal, seed=args.seed, **scale)
+        _copy_journal(journal, run_dir)
+        results = asyncio.run(_run(args, run_dir))
+    finally:
+        if not args.keep:
+            shutil.rmtree(run_dir, ignore_errors=True)
+
+    report = {
+        "scale": {**scale, "seed": args.seed},
+        "concurrency": args.concurrency,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "scenarios": results,
+    }
+    _print_results(results)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+    if args.save_baseline:
+        BASELINE_DIR.mkdir(exist_ok=True)
+        (BASELINE_DIR / f"{args.save_baseline}.json").write_text(json.dumps(report, indent=2))
+    if args.baseline:
+        baseline = json.loads((BASELINE_DIR / f"{args.baseline}.json").read_text())
+        if baseline["scale"] != report["scale"] or baseline["concurrency"] != report["concurrency"]:
+            print("warning: baseline was recorded with a different scale or concurrency", file=sys.stderr)
+        regressions = _compare(results, baseline["scenarios"], args.threshold, args.rss_threshold, args.min_delta_ms)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"no regressions against baseline {args.baseline!r}")
+    return 0
+
+
+def _copy_journal(journal: Path, run_dir: Path) -> None:
+    source = sqlite3.connect(journal / "app.db")
+    target = sqlite3.connect(run_dir / "app.db")
+    try:
+        source.backup(target)
+        # Uploads are stored by absolute path, so point them at the copy.
+        old_root, new_root = str(journal / "uploads"), str(run_dir / "uploads")
+        target.execute(
+            "UPDATE beans SET image_path = replace(image_path, ?1, ?2), "
+            "thumbnail_path = replace(thumbnail_path, ?1, ?2) WHERE image_path IS NOT NULL",
+            (old_root, new_root),
+        )
+        target.execute(
+            "UPDATE drink_logs SET photo_path = replace(photo_path, ?1, ?2), "
+            "thumbnail_path = replace(thumbnail_path, ?1, ?2) WHERE photo_path IS NOT NULL",
+            (old_root, new_root),
+        )
+        target.commit()
+    finally:
+        source.close()
+        target.close()
+    if (journal / "uploads").exists():
+        shutil.copytree(journal / "uploads", run_dir / "uploads")
+
+
+async def _run(args: argparse.Namespace, run_dir: Path) -> dict[str, dict]:
+    from app.main import app
+
+    scenarios = _scenarios(run_dir)
+    if args.only:
+        scenarios = [item for item in scenarios if any(fnmatch.fnmatch(item.name, pattern) for pattern in args.only)]
+    client = Client(app)
+    results = {}
+    async with app.router.lifespan_context(app):
+        for scenario in scenarios:
+            iterations = args.heavy_iterations if scenario.heavy else args.iterations
+            warmup = min(args.warmup, 1) if scenario.heavy else args.warmup
+            results[scenario.name] = await _measure(client, scenario, iterations, warmup, args.concurrency)
+            print(f"{scenario.name} done", file=sys.stderr)
+    return results
+
+
+async def _measure(client: Client, scenario: Scenario, iterations: int, warmup: int, concurrency: int) -> dict:
+    rng = random.Random(scenario.name)
+    for index in range(warmup):
+        if scenario.setup:
+            scenario.setup()
+        await scenario.send(client, rng, index)
+
+    latencies: list[float] = []
+    counter = iter(range(warmup, warmup + iterations))
+
+    async def worker() -> None:
+        for index in counter:
+            if scenario.setup:
+                scenario.setup()
+            began = time.perf_counter()
+            await scenario.send(client, rng, index)
+            latencies.append((time.perf_counter() - began) * 1000)
+
+    _reset_peak_rss()
+    began = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - began
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "p50_ms": round(_percentile(latencies, 50), 3),
+        "p95_ms": round(_percentile(latencies, 95), 3),
+        "p99_ms": round(_percentile(latencies, 99), 3),
+        "max_ms": round(latencies[-1], 3) if latencies else 0.0,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "peak_rss_mib": round(_peak_rss_mib(), 1),
+    }
+
+
+def _scenarios(run_dir: Path) -> list[Scenario]:
+    from sqlalchemy import select
+
+    from app.database import SessionLocal
+    from app.memo import recommended_settings_memo
+    from app.models import Bean, DrinkLog
+    from app.routers.export import _json_array_items, iter_table_dicts
+    from app.schemas import DrinkLogCreate
+
+    with SessionLocal() as db:
+        bean_ids = list(db.scalars(select(Bean.id)))
+        active_bean_ids = list(db.scalars(select(Bean.id).where(Bean.archived.is_(False)))) or bean_ids
+        drink_ids = list(db.scalars(select(DrinkLog.id).order_by(DrinkLog.id).limit(1000)))
+        photos = [
+            str(Path(path).relative_to(run_dir / "uploads"))
+            for path in db.scalars(select(Bean.image_path).where(Bean.image_path.is_not(None)))
+        ]
+        import_body = (
+            '{"beans": ['
+            + "".join(_json_array_items(iter_table_dicts(db, Bean.__table__)))
+            + '], "drinks": ['
+            + "".join(_json_array_items(islice(iter_table_dicts(db, DrinkLog.__table__), IMPORT_DRINKS)))
+            + "]}"
+        ).encode()
+
+    base_photo = _photo()
+    payload_fields = set(DrinkLogCreate.model_fields)
+    # Writes target rows created by earlier scenarios, or journal rows when run alone.
+    created_beans: list[str] = []
+    created_drinks: list[str] = []
+
+    def drink_payload(rng: random.Random) -> dict:
+        row = journal_drink_row(rng, rng.choice(active_bean_ids), datetime.utcnow(), 14, "Medium")
+        return {key: value for key, value in row.items() if key in payload_fields}
+
+    def get(url: Callable[[random.Random, int], str]) -> Callable[[Client, random.Random, int], Awaitable[Response]]:
+        return lambda client, rng, index: client.request("GET", url(rng, index))
+
+    def send_json(client: Client, method: str, url: str, payload: dict) -> Awaitable[Response]:
+        return client.request(method, url, json.dumps(payload).encode(), "application/json", keep_body=True)
+
+    async def create_bean(client: Client, rng: random.Random, index: int) -> Response:
+        response = await send_json(client, "POST", "/api/beans", {"name": f"Bench bean {index}", "roaster": "Bench"})
+        created_beans.append(response.json()["id"])
+        return response
+
+    async def update_bean(client: Client, rng: random.Random, index: int) -> Response:
+        payload = {"name": f"Bench bean {index}", "notes": "updated"}
+        return await send_json(client, "PUT", f"/api/beans/{rng.choice(created_beans or bean_ids)}", payload)
+
+    async def create_drink(client: Client, rng: random.Random, index: int) -> Response:
+        response = await send_json(client, "POST", "/api/drinks", drink_payload(rng))
+        created_drinks.append(response.json()["id"])
+        return response
+
+    async def update_drink(client: Client, rng: random.Random, index: int) -> Response:
+        drink_id = rng.choice(created_drinks or drink_ids)
+        return await send_json(client, "PUT", f"/api/drinks/{drink_id}", drink_payload(rng))
+
+    async def delete_drink(client: Client, rng: random.Random, index: int) -> Response:
+        return await client.request("DELETE", f"/api/drinks/{(created_drinks or drink_ids).pop()}")
+
+    async def upload_photo(client: Client, rng: random.Random, index: int, url: str) -> Response:
+        # A comment segment after the JPEG header makes every upload new content.
+        comment = uuid.UUID(int=rng.getrandbits(128)).bytes
+        photo = base_photo[:2] + b"\xff\xfe" + (len(comment) + 2).to_bytes(2, "big") + comment + base_photo[2:]
+        body, content_type = _multipart("file", "photo.jpg", photo, "image/jpeg")
+        return await client.request("POST", url, body, content_type)
+
+    async def bulk_drinks(client: Client, rng: random.Random, index: int) -> Response:
+        body = "\n".join(json.dumps(drink_payload(rng)) for _ in range(BULK_ROWS)).encode()
+        return await client.request("POST", "/api/drinks/bulk", body, "application/x-ndjson")
+
+    async def import_journal(client: Client, rng: random.Random, index: int) -> Response:
+        body, content_type = _multipart("file", "export.json", import_body, "application/json")
+        return await client.request("POST", "/api/import", body, content_type)
+
+    def clear_export_archives() -> None:
+        for path in (run_dir / "exports").glob("export-*.zip"):
+            path.unlink()
+
+    scenarios = [
+        Scenario("health", get(lambda rng, index: "/health")),
+        Scenario("beans.list", get(lambda rng, index: "/api/beans")),
+        Scenario("beans.list_fields", get(lambda rng, index: "/api/beans?include_archived=true&fields=id,name")),
+        Scenario("beans.get", get(lambda rng, index: f"/api/beans/{rng.choice(bean_ids)}")),
+        Scenario("beans.analytics", get(lambda rng, index: f"/api/beans/{rng.choice(bean_ids)}/analytics")),
+        Scenario(
+            "beans.recommended_settings",
+            get(lambda rng, index: f"/api/beans/{rng.choice(bean_ids)}/recommended-settings"),
+            setup=recommended_settings_memo.clear,
+        ),
+        Scenario("drinks.list", get(lambda rng, index: "/api/drinks")),
+        Scenario("drinks.list_expand", get(lambda rng, index: "/api/drinks?expand=bean&limit=200")),
+        Scenario(
+            "drinks.list_filtered",
+            get(lambda rng, index: f"/api/drinks?bean_id={rng.choice(bean_ids)}&min_rating=4&limit=100"),
+        ),
+        Scenario("drinks.get", get(lambda rng, index: f"/api/drinks/{rng.choice(drink_ids)}?expand=bean")),
+        Scenario("analytics.global", get(lambda rng, index: "/api/analytics")),
+        Scenario("analytics.series", get(lambda rng, index: "/api/analytics/series?bucket=week")),
+        Scenario("analytics.dashboard", get(lambda rng, index: "/api/analytics/dashboard")),
+        Scenario("search", get(lambda rng, index: f"/api/search?q={rng.choice(FLAVOURS).split()[0]}")),
+        Scenario("metrics", get(lambda rng, index: "/metrics")),
+        Scenario("export.json", get(lambda rng, index: "/api/export.json"), heavy=True),
+        Scenario("export.csv", get(lambda rng, index: "/api/export.csv"), heavy=True),
+        Scenario("export.zip", get(lambda rng, index: "/api/export.zip"), heavy=True, setup=clear_export_archives),
+        Scenario("beans.create", create_bean),
+        Scenario("beans.update", update_bean),
+        Scenario(
+            "beans.photo",
+            lambda client, rng, index: upload_photo(
+                client, rng, index, f"/api/beans/{rng.choice(created_beans or bean_ids)}/photo"
+            ),
+        ),
+        Scenario("drinks.create", create_drink),
+        Scenario("drinks.update", update_drink),
+        Scenario(
+            "drinks.photo",
+            lambda client, rng, index: upload_photo(
+                client, rng, index, f"/api/drinks/{rng.choice(created_drinks or drink_ids)}/photo"
+            ),
+        ),
+        Scenario("drinks.delete", delete_drink),
+        Scenario("drinks.bulk", bulk_drinks, heavy=True),
+        Scenario("import", import_journal, heavy=True),
+    ]
+    if photos:
+        scenarios += [
+            Scenario("uploads.static", get(lambda rng, index: f"/uploads/{rng.choice(photos)}")),
+            # A new width every request, so each one renders instead of hitting the cache.
+            Scenario(
+                "uploads.render", get(lambda rng, index: f"/uploads/{rng.choice(photos)}/render?w={200 + index}")
+            ),
+        ]
+    return scenarios
+
+
+def _photo() -> bytes:
+    from PIL import Image
+
+    noise = Image.effect_noise((1600, 1200), 40).convert("RGB")
+    tint = Image.new("RGB", noise.size, (150, 100, 60))
+    buffer = io.BytesIO()
+    Image.blend(noise, tint, 0.6).save(buffer, format="JPEG", quality=85)
+    return buffer.getvalue()
+
+
+def _multipart(field: str, filename: str, content: bytes, content_type: str) -> tuple[bytes, str]:
+    boundary = uuid.uuid4().hex
+    head = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        f"Content-Type: {content_type}\r\n\r\n"
+    ).encode()
+    return head + content + f"\r\n--{boundary}--\r\n".encode(), f"multipart/form-data; boundary={boundary}"
+
+
+def _reset_peak_rss() -> None:
+    # Linux resets VmHWM to the current RSS when "5" is written here.
+    try:
+        Path("/proc/self/clear_refs").write_text("5")
+    except OSError:
+        pass
+
+
+def _peak_rss_mib() -> float:
+    try:
+        for line in Path("/proc/self/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _percentile(samples: list[float], percent: float) -> float:
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(len(samples) * percent / 100))]
+
+
+def _print_results(results: dict[str, dict]) -> None:
+    print(
+        f"{'scenario':<28} {'requests':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+        f"{'max ms':>9} {'req/s':>8} {'peak MiB':>9}"
+    )
+    for name, result in results.items():
+        print(
+            f"{name:<28} {result['requests']:>8} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} "
+            f"{result['p99_ms']:>9.2f} {result['max_ms']:>9.2f} {result['throughput_rps']:>8.1f} "
+            f"{result['peak_rss_mib']:>9.1f}"
+        )
+
+
+def _compare(
+    results: dict[str, dict], baseline: dict[str, dict], threshold: float, rss_threshold: float, min_delta_ms: float
+) -> list[str]:
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        for key in ("p50_ms", "p95_ms"):
+            if result[key] > before[key] * (1 + threshold) and result[key] - before[key] >= min_delta_ms:
+                regressions.append(f"{name} {key} {before[key]:.2f} -> {result[key]:.2f}")
+        if result["throughput_rps"] < before["throughput_rps"] * (1 - threshold):
+            regressions.append(
+                f"{name} throughput_rps {before['throughput_rps']:.1f} -> {result['throughput_rps']:.1f}"
+            )
+        if result["peak_rss_mib"] > before["peak_rss_mib"] * (1 + rss_threshold):
+            regressions.append(f"{name} peak_rss_mib {before['peak_rss_mib']:.1f} -> {result['peak_rss_mib']:.1f}")
+    return regressions
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
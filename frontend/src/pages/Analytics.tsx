@@ -1,39 +1,24 @@
 import { useEffect, useState } from 'react';
 import { apiGet } from '../utils/api';
-import { DrinkLog } from '../utils/types';
+import { GlobalAnalyticsSeries } from '../utils/types';
 import { LineChart, Line, ResponsiveContainer, CartesianGrid, XAxis, YAxis, Tooltip, BarChart, Bar } from 'recharts';
 
 export default function Analytics() {
-  const [drinks, setDrinks] = useState<DrinkLog[]>([]);
+  const [series, setSeries] = useState<GlobalAnalyticsSeries | null>(null);
 
   useEffect(() => {
-    apiGet<DrinkLog[]>('/api/drinks').then(setDrinks);
+    apiGet<GlobalAnalyticsSeries>('/api/analytics/series?bucket=day').then(setSeries);
   }, []);
 
-  const ratingsByDay = Object.values(
-    drinks.reduce((acc, drink) => {
-      const day = drink.created_at.split('T')[0];
-      if (!acc[day]) {
-        acc[day] = { day, ratings: [] as number[] };
-      }
-      acc[day].ratings.push(drink.overall_rating);
-      return acc;
-    }, {} as Record<string, { day: string; ratings: number[] }> )
-  ).map((entry) => ({
-    day: entry.day,
-    average: entry.ratings.reduce((sum, val) => sum + val, 0) / entry.ratings.length
+  const ratingsByDay = (series?.rating_timeline || []).map((entry) => ({
+    day: entry.bucket,
+    average: entry.average_rating
   }));
 
-  const byMaker = Object.values(
-    drinks.reduce((acc, drink) => {
-      const maker = drink.made_by || 'Unknown';
-      if (!acc[maker]) {
-        acc[maker] = { maker, total: 0 };
-      }
-      acc[maker].total += 1;
-      return acc;
-    }, {} as Record<string, { maker: string; total: number }>)
-  );
+  const byMaker = (series?.by_made_by || []).map((entry) => ({
+    maker: entry.key || 'Unknown',
+    total: entry.drink_count
+  }));
 
   return (
     <div className="grid two">
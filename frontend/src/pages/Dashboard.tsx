@@ -19,6 +19,7 @@ type Props = { unit: string };
 export default function Dashboard({ unit }: Props) {
   const [beans, setBeans] = useState<Bean[]>([]);
   const [drinks, setDrinks] = useState<DrinkLog[]>([]);
+  const [lastDrink, setLastDrink] = useState<DrinkLog | null>(null);
   const [beanId, setBeanId] = useState('');
   const [drinkType, setDrinkType] = useState(DRINK_TYPES[0]);
   const [form, setForm] = useState(defaultDrink);
@@ -39,9 +40,21 @@ export default function Dashboard({ unit }: Props) {
     load();
   }, []);
 
-  const lastDrink = useMemo(() => {
-    return drinks.find((drink) => drink.bean_id === beanId && drink.drink_type === drinkType);
-  }, [drinks, beanId, drinkType]);
+  useEffect(() => {
+    if (!beanId) {
+      setLastDrink(null);
+      return;
+    }
+    // The recent list is only the newest page, so look the last drink up directly.
+    let cancelled = false;
+    const params = new URLSearchParams({ bean_id: beanId, drink_type: drinkType, limit: '1' });
+    apiGet<DrinkLog[]>(`/api/drinks?${params}`).then((rows) => {
+      if (!cancelled) setLastDrink(rows[0] ?? null);
+    });
+    return () => {
+      cancelled = true;
+    };
+  }, [beanId, drinkType]);
 
   const beanBest = useMemo(() => {
     const bean = beans.find((item) => item.id === beanId);
@@ -92,6 +105,7 @@ export default function Dashboard({ unit }: Props) {
     };
     const created = await apiSend<DrinkLog>('/api/drinks', 'POST', payload);
     setDrinks((prev) => [created, ...prev]);
+    setLastDrink(created);
     addRecentName(madeBy);
     setMessage('Saved!');
     setTimeout(() => setMessage(''), 2000);
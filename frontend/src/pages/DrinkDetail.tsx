@@ -11,13 +11,15 @@ export default function DrinkDetail({ unit }: { unit: string }) {
   const { drinkId } = useParams();
   const navigate = useNavigate();
   const [drink, setDrink] = useState<DrinkLog | null>(null);
-  const [beans, setBeans] = useState<Bean[]>([]);
+  const [beans, setBeans] = useState<Pick<Bean, 'id' | 'name'>[]>([]);
 
   useEffect(() => {
     if (!drinkId) return;
     const load = async () => {
-      const drinkRes = await apiGet<DrinkLog>(`/api/drinks/${drinkId}`);
-      const beansRes = await apiGet<Bean[]>('/api/beans?include_archived=true');
+      const [drinkRes, beansRes] = await Promise.all([
+        apiGet<DrinkLog>(`/api/drinks/${drinkId}?expand=bean`),
+        apiGet<Pick<Bean, 'id' | 'name'>[]>('/api/beans?include_archived=true&fields=id,name')
+      ]);
       setDrink(drinkRes);
       setBeans(beansRes);
     };
@@ -1,14 +1,27 @@
 import { useEffect, useState } from 'react';
 import { Link } from 'react-router-dom';
-import { apiGet } from '../utils/api';
+import { apiGetPage } from '../utils/api';
 import { DrinkLog } from '../utils/types';
 import { formatVolume } from '../utils/units';
 
+const LIST_FIELDS = ['id', 'drink_type', 'coffee_volume_ml', 'temperature_level', 'grind_setting', 'overall_rating', 'notes'] as const;
+
+type DrinkRow = Pick<DrinkLog, (typeof LIST_FIELDS)[number]>;
+
 export default function Drinks({ unit }: { unit: string }) {
-  const [drinks, setDrinks] = useState<DrinkLog[]>([]);
+  const [drinks, setDrinks] = useState<DrinkRow[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+
+  const loadPage = async (cursor: string | null) => {
+    const params = new URLSearchParams({ fields: LIST_FIELDS.join(',') });
+    if (cursor) params.set('cursor', cursor);
+    const page = await apiGetPage<DrinkRow>(`/api/drinks?${params}`);
+    setDrinks((prev) => (cursor ? [...prev, ...page.items] : page.items));
+    setNextCursor(page.nextCursor);
+  };
 
   useEffect(() => {
-    apiGet<DrinkLog[]>('/api/drinks').then(setDrinks);
+    loadPage(null);
   }, []);
 
   return (
@@ -28,6 +41,7 @@ export default function Drinks({ unit }: { unit: string }) {
           <Link to={`/drinks/${drink.id}`}>View / Edit</Link>
         </div>
       ))}
+      {nextCursor && <button onClick={() => loadPage(nextCursor)}>Load more</button>}
     </section>
   );
 }
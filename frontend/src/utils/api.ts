@@ -27,3 +27,13 @@ export const uploadFile = async <T>(path: string, file: File): Promise<T> => {
   }
   return res.json();
 };
+
+export type Page<T> = { items: T[]; nextCursor: string | null };
+
+export const apiGetPage = async <T>(path: string): Promise<Page<T>> => {
+  const res = await fetch(path);
+  if (!res.ok) {
+    throw new Error(`Failed ${res.status}`);
+  }
+  return { items: await res.json(), nextCursor: res.headers.get('X-Next-Cursor') };
+};
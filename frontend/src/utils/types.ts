@@ -46,8 +46,11 @@ export type DrinkLog = {
   notes?: string | null;
   photo_path?: string | null;
   thumbnail_path?: string | null;
+  bean?: BeanSummary | null;
 };
 
+export type BeanSummary = Pick<Bean, 'id' | 'name' | 'roaster' | 'origin' | 'roast_level' | 'decaf' | 'archived' | 'thumbnail_path'>;
+
 export type BeanAnalytics = {
   rating_vs_grind: { x: number; y: number }[];
   rating_vs_coffee_volume: { x: number; y: number }[];
@@ -61,3 +64,18 @@ export type RecommendedSettings = {
   highest_rated?: Record<string, unknown> | null;
   total_considered: number;
 };
+
+export type DistributionEntry = {
+  key?: string | null;
+  drink_count: number;
+  average_rating: number;
+};
+
+export type GlobalAnalyticsSeries = {
+  bucket: 'day' | 'week' | 'month';
+  rating_timeline: { bucket: string; drink_count: number; average_rating: number }[];
+  by_drink_type: DistributionEntry[];
+  by_made_by: DistributionEntry[];
+  by_strength: DistributionEntry[];
+  rating_histogram: { rating: number; drink_count: number }[];
+};